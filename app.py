@@ -1,7 +1,8 @@
 import logging
 import asyncio
+import argparse
 from src.gradio import launch_ui
-from src.vector import VectorDB
+from src.services import services
 
 logging.basicConfig(
     level=logging.INFO,
@@ -10,14 +11,24 @@ logging.basicConfig(
 
 CLEAR_DATA = False    # Clear all data from the vector database
 INSERT_DATA = False   # Parse and insert all data into the vector database
+SYNC_DATA = False     # Re-index only new, changed or deleted PDFs in the data folder
 
-async def main():
-    vectordb = VectorDB()
+async def main(preload: bool):
     if CLEAR_DATA:
-        vectordb.clear()
+        services.vectordb.clear()
     if INSERT_DATA:
-        await vectordb.insert()
+        await services.vectordb.insert()
+    elif SYNC_DATA:
+        await services.vectordb.sync()
+    if INSERT_DATA or SYNC_DATA:
+        services.faq_store.build()
+    if preload:
+        # models, indexes and clients are otherwise built on the first request
+        await asyncio.to_thread(services.preload)
     launch_ui()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the faculty handbook QA chatbot.")
+    parser.add_argument("--preload", action="store_true", help="build and warm every service in parallel before serving")
+    args = parser.parse_args()
+    asyncio.run(main(args.preload))
@@ -0,0 +1,499 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, PointIdsList, QueryRequest, Filter, FieldCondition, MatchValue,
+    HnswConfigDiff, ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization,
+    BinaryQuantizationConfig, QuantizationSearchParams, SearchParams, Disabled, KeywordIndexParams, KeywordIndexType,
+)
+from src.config import Config
+from src.embedder import Embedder
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScoredChunk:
+    id: str
+    score: float
+    payload: dict
+
+
+@dataclass
+class QueryResult:
+    """
+    Same shape as Qdrant's QueryResponse: a `points` list of objects with id, score and payload.
+    """
+    points: List[ScoredChunk] = field(default_factory=list)
+
+
+class VectorBackend:
+    """
+    Storage and nearest-neighbour search for chunk vectors, filtered by source filename.
+    """
+    def upsert(self, ids: List[str], vectors: List[List[float]], payloads: List[dict]):
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    def query(self, vector: List[float], filename: Optional[str], top_k: int):
+        raise NotImplementedError
+
+    async def aquery(self, vector: List[float], filename: Optional[str], top_k: int):
+        """
+        Non-blocking query. Backends without a native async client run `query` in a worker thread.
+        """
+        return await asyncio.to_thread(self.query, vector, filename, top_k)
+
+    def query_batch(self, vectors: List[List[float]], filenames: List[Optional[str]], top_k: int) -> list:
+        """
+        Run several queries at once, returning one result per query in input order.
+        """
+        return [self.query(vector, filename, top_k) for vector, filename in zip(vectors, filenames)]
+
+    def iter_points(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield (point_id, payload) for every stored point.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class QdrantBackend(VectorBackend):
+    """
+    Qdrant storage with a managed collection schema: a keyword payload index on the
+    course filename, optional int8/binary quantization, and tunable HNSW parameters,
+    all taken from Config and applied idempotently at startup. With
+    QDRANT_PARTITIONING="collection" each course file gets its own collection.
+    """
+    def __init__(self, collection_name: str = Config.COLLECTION_NAME, partitioning: str = Config.QDRANT_PARTITIONING):
+        self.client = QdrantClient(
+            url=f"http://{Config.QDRANT_HOST}:{Config.QDRANT_PORT}",
+            api_key=Config.QDRANT_API_KEY
+        )
+        logger.info(f"Connected to Qdrant at {Config.QDRANT_HOST}:{Config.QDRANT_PORT}")
+        self.collection_name = collection_name
+        self.partitioning = partitioning
+        self._async_client = None
+        self._ready = set()
+
+        for name in self._expected_collections():
+            self._ensure_collection(name)
+
+    def collection_for(self, filename: Optional[str]) -> str:
+        if self.partitioning != "collection" or not filename:
+            return self.collection_name
+        course = re.sub(r"[^A-Za-z0-9_-]+", "_", os.path.splitext(filename)[0])
+        return f"{self.collection_name}_{course}"
+
+    def _expected_collections(self) -> List[str]:
+        if self.partitioning != "collection":
+            return [self.collection_name]
+        return sorted({self.collection_for(filename) for filename in Config.COURSE_TO_FILE_MAP.values()})
+
+    def _collections(self) -> List[str]:
+        """
+        Every collection this backend stores points in.
+        """
+        if self.partitioning != "collection":
+            return [self.collection_name]
+        prefix = f"{self.collection_name}_"
+        return [c.name for c in self.client.get_collections().collections if c.name.startswith(prefix)]
+
+    @staticmethod
+    def _quantization_config():
+        if Config.QDRANT_QUANTIZATION == "int8":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=Config.QDRANT_QUANTIZATION_ALWAYS_RAM,
+            ))
+        if Config.QDRANT_QUANTIZATION == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=Config.QDRANT_QUANTIZATION_ALWAYS_RAM))
+        return None
+
+    def _search_params(self) -> SearchParams:
+        quantization = None
+        if Config.QDRANT_QUANTIZATION != "none":
+            quantization = QuantizationSearchParams(rescore=Config.QDRANT_RESCORE, oversampling=Config.QDRANT_OVERSAMPLING)
+        return SearchParams(hnsw_ef=Config.QDRANT_SEARCH_EF or None, quantization=quantization)
+
+    def _create_collection(self, name: Optional[str] = None):
+        self.client.create_collection(
+            collection_name=name or self.collection_name,
+            vectors_config=VectorParams(
+                size=Embedder.get_dimension(),
+                distance=Distance.COSINE,
+                on_disk=Config.QDRANT_VECTORS_ON_DISK,
+            ),
+            hnsw_config=HnswConfigDiff(m=Config.QDRANT_HNSW_M, ef_construct=Config.QDRANT_HNSW_EF_CONSTRUCT),
+            quantization_config=self._quantization_config(),
+        )
+
+    def _ensure_collection(self, name: str):
+        """
+        Create the collection, or bring an existing one in line with the configured
+        schema. Only settings that differ are updated, so restarts are cheap.
+        """
+        if name in self._ready:
+            return
+        if not self.client.collection_exists(collection_name=name):
+            self._create_collection(name)
+            logger.info(f"Created collection '{name}'.")
+        else:
+            config = self.client.get_collection(collection_name=name).config
+            hnsw = config.hnsw_config
+            if (hnsw.m, hnsw.ef_construct) != (Config.QDRANT_HNSW_M, Config.QDRANT_HNSW_EF_CONSTRUCT):
+                self.client.update_collection(
+                    collection_name=name,
+                    hnsw_config=HnswConfigDiff(m=Config.QDRANT_HNSW_M, ef_construct=Config.QDRANT_HNSW_EF_CONSTRUCT),
+                )
+                logger.info(f"Updated HNSW settings of collection '{name}'.")
+            quantization = self._quantization_config()
+            if type(config.quantization_config) is not type(quantization):
+                self.client.update_collection(
+                    collection_name=name,
+                    quantization_config=quantization or Disabled.DISABLED,
+                )
+                logger.info(f"Set quantization of collection '{name}' to {Config.QDRANT_QUANTIZATION}.")
+
+        if Config.QDRANT_FILENAME_INDEX:
+            schema = self.client.get_collection(collection_name=name).payload_schema
+            if "metadata.filename" not in schema:
+                self.client.create_payload_index(
+                    collection_name=name,
+                    field_name="metadata.filename",
+                    field_schema=KeywordIndexParams(
+                        type=KeywordIndexType.KEYWORD,
+                        is_tenant=Config.QDRANT_FILENAME_IS_TENANT,
+                    ),
+                    wait=True,
+                )
+                logger.info(f"Created payload index on metadata.filename for '{name}'.")
+        self._ready.add(name)
+        logger.info(f"Collection '{name}' is ready.")
+
+    def upsert(self, ids, vectors, payloads):
+        groups = {}
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            name = self.collection_for(payload.get("metadata", {}).get("filename"))
+            groups.setdefault(name, []).append(PointStruct(id=point_id, vector=vector, payload=payload))
+        for name, points in groups.items():
+            self._ensure_collection(name)
+            self.client.upload_points(
+                collection_name=name,
+                points=points,
+                batch_size=64,
+                parallel=4
+            )
+
+    def delete(self, ids):
+        if ids:
+            for name in self._collections():
+                self.client.delete(
+                    collection_name=name,
+                    points_selector=PointIdsList(points=list(ids)),
+                )
+
+    @staticmethod
+    def _filename_filter(filename) -> Filter:
+        return Filter(must=[FieldCondition(key='metadata.filename', match=MatchValue(value=filename))])
+
+    def query(self, vector, filename, top_k):
+        return self.client.query_points(
+            collection_name=self.collection_for(filename),
+            query=vector,
+            query_filter=self._filename_filter(filename),
+            search_params=self._search_params(),
+            limit=top_k,
+            with_payload=True,
+            with_vectors=False,
+        )
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """
+        Created on first use, so it binds to the event loop that awaits it.
+        """
+        if self._async_client is None:
+            self._async_client = AsyncQdrantClient(
+                url=f"http://{Config.QDRANT_HOST}:{Config.QDRANT_PORT}",
+                api_key=Config.QDRANT_API_KEY
+            )
+        return self._async_client
+
+    async def aquery(self, vector, filename, top_k):
+        if not Config.QDRANT_ASYNC:
+            return await super().aquery(vector, filename, top_k)
+        return await self.async_client.query_points(
+            collection_name=self.collection_for(filename),
+            query=vector,
+            query_filter=self._filename_filter(filename),
+            search_params=self._search_params(),
+            limit=top_k,
+            with_payload=True,
+            with_vectors=False,
+        )
+
+    def query_batch(self, vectors, filenames, top_k):
+        groups = {}
+        for i, filename in enumerate(filenames):
+            groups.setdefault(self.collection_for(filename), []).append(i)
+
+        results = [None] * len(vectors)
+        for name, indices in groups.items():
+            responses = self.client.query_batch_points(
+                collection_name=name,
+                requests=[
+                    QueryRequest(
+                        query=vectors[i],
+                        filter=self._filename_filter(filenames[i]),
+                        params=self._search_params(),
+                        limit=top_k,
+                        with_payload=True,
+                        with_vector=False,
+                    )
+                    for i in indices
+                ],
+            )
+            for i, response in zip(indices, responses):
+                results[i] = response
+        return results
+
+    def iter_points(self):
+        for name in self._collections():
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=name,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                for point in points:
+                    yield str(point.id), point.payload
+                if offset is None:
+                    break
+
+    def drop(self):
+        """
+        Delete every collection of this backend.
+        """
+        for name in self._collections():
+            self.client.delete_collection(collection_name=name)
+        self._ready.clear()
+
+    def clear(self):
+        self.drop()
+        for name in self._expected_collections():
+            self._ensure_collection(name)
+
+
+class LocalIndex(NamedTuple):
+    """
+    One immutable version of the local index. Writers build a new one and swap it in
+    as a whole, so a concurrent query always sees matching vectors, IDs and payloads.
+    """
+    vectors: np.ndarray
+    ids: List[str]
+    payloads: List[dict]
+    partitions: Dict[str, Tuple[int, int]]
+
+
+class LocalBackend(VectorBackend):
+    """
+    In-process index: a memory-mapped matrix of L2-normalised vectors whose rows are
+    grouped into contiguous per-file partitions, searched by exact cosine top-k.
+    Reloaded when another process (e.g. an ingest run) rewrites the files.
+
+    Files under `path`:
+      vectors.npy      (n, dim) float32 or float16 matrix
+      points.jsonl     one {"id", "payload"} record per matrix row
+      partitions.json  {filename: [start_row, stop_row]}, replaced last on every write
+    """
+    def __init__(self, path: str = Config.LOCAL_INDEX_PATH, dtype: str = Config.LOCAL_INDEX_DTYPE):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._write_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._index = None
+        self._version = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _file_version(self):
+        """
+        Identity of the last file replaced on write; os.replace gives it a new inode each time.
+        """
+        try:
+            stat = os.stat(self._file("partitions.json"))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _read(self) -> Optional[LocalIndex]:
+        """
+        Read the index files, or return None if they are mid-rewrite and do not match.
+        Callers also discard the read if partitions.json changed while it ran.
+        """
+        if self._file_version() is None:
+            return LocalIndex(np.empty((0, Embedder.get_dimension()), dtype=self.dtype), [], [], {})
+        try:
+            vectors = np.load(self._file("vectors.npy"), mmap_mode="r")
+            with open(self._file("points.jsonl"), "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            with open(self._file("partitions.json"), "r", encoding="utf-8") as f:
+                partitions = {name: tuple(rows) for name, rows in json.load(f).items()}
+        except (OSError, ValueError):
+            return None
+        if len(records) != len(vectors) or any(stop > len(records) for _, stop in partitions.values()):
+            return None
+        return LocalIndex(vectors, [record["id"] for record in records], [record["payload"] for record in records], partitions)
+
+    @property
+    def index(self) -> LocalIndex:
+        """
+        The current index, reloaded if the files changed on disk since it was read.
+        """
+        version = self._file_version()
+        if self._index is None or version != self._version:
+            with self._load_lock:
+                if self._index is None or version != self._version:
+                    index = self._read()
+                    if index is not None and self._file_version() == version:
+                        self._index, self._version = index, version
+                    elif self._index is None:
+                        raise RuntimeError(f"Local index at {self.path} is incomplete")
+        return self._index
+
+    def _save(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]):
+        """
+        Rewrite the index with rows sorted by filename, then swap in the memory-mapped result.
+        """
+        order = sorted(range(len(ids)), key=lambda i: payloads[i].get("metadata", {}).get("filename", ""))
+        ids = [ids[i] for i in order]
+        payloads = [payloads[i] for i in order]
+        vectors = vectors[order].astype(self.dtype)
+
+        partitions: Dict[str, List[int]] = {}
+        for row, payload in enumerate(payloads):
+            filename = payload.get("metadata", {}).get("filename", "")
+            partitions.setdefault(filename, [row, row])[1] = row + 1
+
+        os.makedirs(self.path, exist_ok=True)
+        np.save(self._file("vectors.tmp.npy"), vectors)
+        with open(self._file("points.jsonl.tmp"), "w", encoding="utf-8") as f:
+            for point_id, payload in zip(ids, payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+        with open(self._file("partitions.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(partitions, f)
+        os.replace(self._file("vectors.tmp.npy"), self._file("vectors.npy"))
+        os.replace(self._file("points.jsonl.tmp"), self._file("points.jsonl"))
+        os.replace(self._file("partitions.json.tmp"), self._file("partitions.json"))
+        self._index = LocalIndex(
+            np.load(self._file("vectors.npy"), mmap_mode="r"),
+            ids,
+            payloads,
+            {name: tuple(rows) for name, rows in partitions.items()},
+        )
+        self._version = self._file_version()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def upsert(self, ids, vectors, payloads):
+        with self._write_lock:
+            index = self.index
+            new_rows = {point_id: row for row, point_id in enumerate(ids)}
+            keep = [row for row, point_id in enumerate(index.ids) if point_id not in new_rows]
+            self._save(
+                [index.ids[row] for row in keep] + list(ids),
+                np.concatenate([
+                    np.asarray(index.vectors[keep], dtype=np.float32),
+                    self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)),
+                ]),
+                [index.payloads[row] for row in keep] + list(payloads),
+            )
+
+    def delete(self, ids):
+        if not ids:
+            return
+        with self._write_lock:
+            index = self.index
+            ids = set(ids)
+            keep = [row for row, point_id in enumerate(index.ids) if point_id not in ids]
+            self._save(
+                [index.ids[row] for row in keep],
+                np.asarray(index.vectors[keep], dtype=np.float32),
+                [index.payloads[row] for row in keep],
+            )
+
+    def query(self, vector, filename, top_k):
+        index = self.index
+        start, stop = index.partitions.get(filename, (0, 0))
+        if stop <= start:
+            return QueryResult()
+        query_vector = self._normalize(np.asarray(vector, dtype=np.float32))
+        # float16 storage only saves memory; numpy has no fast float16 matmul, so score in float32
+        scores = np.asarray(index.vectors[start:stop], dtype=np.float32) @ query_vector
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return QueryResult(points=[
+            ScoredChunk(id=index.ids[start + row], score=float(scores[row]), payload=index.payloads[start + row])
+            for row in top
+        ])
+
+    def query_batch(self, vectors, filenames, top_k):
+        """
+        Score all queries against the same partition with one matrix product per partition.
+        """
+        index = self.index
+        results = [QueryResult() for _ in vectors]
+        query_vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+        rows_by_file = {}
+        for row, filename in enumerate(filenames):
+            rows_by_file.setdefault(filename, []).append(row)
+
+        for filename, rows in rows_by_file.items():
+            start, stop = index.partitions.get(filename, (0, 0))
+            if stop <= start:
+                continue
+            scores = query_vectors[rows] @ np.asarray(index.vectors[start:stop], dtype=np.float32).T
+            k = min(top_k, stop - start)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for row, row_scores, row_top in zip(rows, scores, top):
+                row_top = row_top[np.argsort(-row_scores[row_top])]
+                results[row] = QueryResult(points=[
+                    ScoredChunk(id=index.ids[start + i], score=float(row_scores[i]), payload=index.payloads[start + i])
+                    for i in row_top
+                ])
+        return results
+
+    def iter_points(self):
+        index = self.index
+        return zip(index.ids, index.payloads)
+
+    def clear(self):
+        with self._write_lock:
+            self._save([], np.empty((0, Embedder.get_dimension()), dtype=np.float32), [])
+
+
+def create_backend(name: str = Config.VECTOR_BACKEND) -> VectorBackend:
+    if name == "qdrant":
+        return QdrantBackend()
+    if name == "local":
+        return LocalBackend()
+    raise ValueError(f"Unknown vector backend: {name}")
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config import Config
+from src.embedder import Embedder
+from src.backends import LocalBackend, QdrantBackend
+
+def synthetic_corpus(num_chunks: int, seed: int = 0):
+    """
+    Random unit vectors spread evenly over the configured course files.
+    """
+    rng = np.random.default_rng(seed)
+    filenames = list(Config.COURSE_TO_FILE_MAP.values())
+    vectors = rng.standard_normal((num_chunks, Embedder.get_dimension())).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(uuid.uuid4()) for _ in range(num_chunks)]
+    payloads = [
+        {"metadata": {"filename": filenames[i % len(filenames)]}, "text": f"chunk {i}"}
+        for i in range(num_chunks)
+    ]
+    return ids, vectors, payloads
+
+def time_queries(backend, queries, filenames, top_k: int):
+    latencies = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        backend.query(query.tolist(), filenames[i % len(filenames)], top_k)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+def report(name: str, latencies_ms: np.ndarray):
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    print(f"{name:<18} p50={p50:7.3f}ms  p95={p95:7.3f}ms  p99={p99:7.3f}ms  mean={latencies_ms.mean():7.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query latency of the local and Qdrant vector backends.")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=Config.RETRIEVE_TOP_K)
+    parser.add_argument("--qdrant", action="store_true", help="also benchmark a running Qdrant server")
+    args = parser.parse_args()
+
+    ids, vectors, payloads = synthetic_corpus(args.chunks)
+    queries = synthetic_corpus(args.queries, seed=1)[1]
+    filenames = list(Config.COURSE_TO_FILE_MAP.values())
+    print(f"{args.chunks} chunks, {args.queries} queries, top_k={args.top_k}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dtype in ("float32", "float16"):
+            backend = LocalBackend(path=os.path.join(tmp_dir, dtype), dtype=dtype)
+            backend.upsert(ids, vectors, payloads)
+            report(f"local ({dtype})", time_queries(backend, queries, filenames, args.top_k))
+
+    if args.qdrant:
+        backend = QdrantBackend(collection_name=f"benchmark-{uuid.uuid4().hex[:8]}")
+        try:
+            backend.upsert(ids, vectors.tolist(), payloads)
+            report("qdrant", time_queries(backend, queries, filenames, args.top_k))
+        finally:
+            backend.drop()
+
+if __name__ == "__main__":
+    main()
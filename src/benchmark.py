@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config import Config
+from src.embedder import Embedder
+from src.vector import VectorDB
+from src.backends import LocalBackend
+from src.bm25 import tokenize
+from src.reranker import RERANKERS
+from src.build_fixture import QUERY_VECTORS_FILE
+
+def silver_labels(expected_response: str, candidates: List[tuple], min_overlap: float) -> set:
+    """
+    Label a chunk relevant when it contains at least `min_overlap` of the distinct
+    tokens of the expected answer. Used when a question has no gold labels.
+    """
+    answer_tokens = {token for token in tokenize(expected_response) if len(token) > 2}
+    if not answer_tokens:
+        return set()
+    return {
+        point_id for point_id, payload in candidates
+        if len(answer_tokens & set(tokenize(payload.get("text", "")))) / len(answer_tokens) >= min_overlap
+    }
+
+def gold_labels(test_case: Dict, points_by_file: Dict[str, List[tuple]], min_overlap: float) -> set:
+    """
+    Relevant point IDs for a question: explicit `gold_chunks` IDs, chunks on the
+    listed `gold_pages`, or silver labels derived from the expected answer.
+    """
+    candidates = points_by_file.get(Config.COURSE_TO_FILE_MAP.get(test_case["course"]), [])
+    if "gold_chunks" in test_case:
+        return set(test_case["gold_chunks"])
+    if "gold_pages" in test_case:
+        pages = set(test_case["gold_pages"])
+        return {point_id for point_id, payload in candidates if payload.get("metadata", {}).get("page") in pages}
+    return silver_labels(test_case["expected_response"], candidates, min_overlap)
+
+def recall_and_rr(ranked_ids: List[str], relevant: set):
+    hits = [i for i, point_id in enumerate(ranked_ids) if point_id in relevant]
+    recall = len(set(ranked_ids) & relevant) / len(relevant)
+    return recall, 1.0 / (hits[0] + 1) if hits else 0.0
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "qps": len(latencies) / max(sum(latencies), 1e-9)}
+
+def load_query_vectors(index: str) -> Optional[Dict[str, list]]:
+    """
+    Query embeddings stored with a fixture by build_fixture.py, if they match EMBED_MODEL_NAME.
+    """
+    path = os.path.join(index, QUERY_VECTORS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+    if stored.get("model") != Config.EMBED_MODEL_NAME:
+        print(f"Ignoring {path}: built with {stored.get('model')}, not {Config.EMBED_MODEL_NAME}")
+        return None
+    return stored["vectors"]
+
+def run_benchmark(
+    test_data,
+    vectordb: VectorDB,
+    reranker,
+    top_ks: List[int],
+    top_ps: List[int],
+    min_overlap: float,
+    query_vectors: Optional[Dict[str, list]] = None,
+) -> List[Dict]:
+    """
+    `query_vectors` maps questions to precomputed embeddings; only questions missing
+    from it are embedded (and timed).
+    """
+    embedder = Embedder()
+    stored_vectors = query_vectors or {}
+    points_by_file = {}
+    for point_id, payload in vectordb.backend.iter_points():
+        points_by_file.setdefault(payload.get("metadata", {}).get("filename"), []).append((str(point_id), payload))
+
+    cases = []
+    for test_case in test_data:
+        relevant = gold_labels(test_case, points_by_file, min_overlap)
+        if relevant:
+            cases.append((test_case, relevant))
+    print(f"{len(cases)}/{len(test_data)} questions have relevant chunks in the index")
+
+    embed_latencies, query_vectors = [], []
+    for test_case, _ in cases:
+        if test_case["user_input"] in stored_vectors:
+            query_vectors.append(stored_vectors[test_case["user_input"]])
+            continue
+        start = time.perf_counter()
+        query_vectors.append(embedder.generate_embedding(test_case["user_input"]))
+        embed_latencies.append(time.perf_counter() - start)
+
+    results = []
+    for top_k in top_ks:
+        search_latencies, retrieved = [], []
+        for (test_case, _), query_vector in zip(cases, query_vectors):
+            start = time.perf_counter()
+            chunks = vectordb.query(test_case["user_input"], test_case["course"], top_k=top_k, query_vector=query_vector)
+            search_latencies.append(time.perf_counter() - start)
+            retrieved.append(chunks.points)
+
+        retrieval_scores = [recall_and_rr([str(c.id) for c in chunks], relevant) for chunks, (_, relevant) in zip(retrieved, cases)]
+        row = {
+            "top_k": top_k,
+            f"recall@{top_k}": float(np.mean([r for r, _ in retrieval_scores])),
+            "mrr": float(np.mean([rr for _, rr in retrieval_scores])),
+            "embed": latency_summary(embed_latencies) if embed_latencies else None,
+            "search": latency_summary(search_latencies),
+        }
+
+        for top_p in (top_ps if reranker else []):
+            reranker.top_n = top_p
+            rerank_latencies, rerank_scores = [], []
+            for chunks, (test_case, relevant) in zip(retrieved, cases):
+                start = time.perf_counter()
+                # same filtering as RAG.rerank_chunks
+                reranked = [c for c in reranker.rerank(chunks, test_case["user_input"]) if c.score >= Config.RERANK_THRESHOLD]
+                rerank_latencies.append(time.perf_counter() - start)
+                rerank_scores.append(recall_and_rr([str(c.id) for c in reranked], relevant))
+            row[f"rerank_top_p={top_p}"] = {
+                "recall": float(np.mean([r for r, _ in rerank_scores])),
+                "mrr": float(np.mean([rr for _, rr in rerank_scores])),
+                **latency_summary(rerank_latencies),
+            }
+        results.append(row)
+    return results
+
+def print_results(results: List[Dict]):
+    def latency(stats):
+        return f"p50={stats['p50_ms']:.2f} p95={stats['p95_ms']:.2f} p99={stats['p99_ms']:.2f}ms qps={stats['qps']:.1f}"
+
+    for row in results:
+        top_k = row["top_k"]
+        print(f"\ntop_k={top_k}: recall@{top_k}={row[f'recall@{top_k}']:.3f} mrr={row['mrr']:.3f}")
+        print(f"  embed   {latency(row['embed']) if row['embed'] else 'precomputed'}")
+        print(f"  search  {latency(row['search'])}")
+        for key, stats in row.items():
+            if key.startswith("rerank_"):
+                print(f"  {key}: recall={stats['recall']:.3f} mrr={stats['mrr']:.3f} {latency(stats)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark: recall@k, MRR and per-stage latency.")
+    parser.add_argument("--benchmark", default="evaluation/evaluation_benchmark.json")
+    parser.add_argument("--index", default=None, help="local index fixture directory (with local/ and bm25.json)")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[Config.RETRIEVE_TOP_K])
+    parser.add_argument("--top-p", type=int, nargs="+", default=[Config.RERANK_TOP_P])
+    parser.add_argument("--reranker", default="none", choices=[*RERANKERS, "none"], help="cross-encoder and cohere need a model download or API key")
+    parser.add_argument("--min-overlap", type=float, default=0.5, help="answer token overlap for silver labels")
+    parser.add_argument("--min-recall", type=float, default=None, help="exit non-zero if recall@k falls below this")
+    parser.add_argument("--output", default=None, help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    with open(args.benchmark, "r") as f:
+        test_data = json.load(f)
+
+    query_vectors = None
+    if args.index:
+        Config.BM25_INDEX_PATH = os.path.join(args.index, "bm25.json")
+        vectordb = VectorDB(backend=LocalBackend(path=os.path.join(args.index, "local")))
+        query_vectors = load_query_vectors(args.index)
+    else:
+        vectordb = VectorDB()
+    reranker = None if args.reranker == "none" else RERANKERS[args.reranker]()
+
+    results = run_benchmark(test_data, vectordb, reranker, args.top_k, args.top_p, args.min_overlap, query_vectors)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.min_recall is not None:
+        failing = [row["top_k"] for row in results if row[f"recall@{row['top_k']}"] < args.min_recall]
+        if failing:
+            print(f"\nrecall below {args.min_recall} for top_k={failing}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
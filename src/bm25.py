@@ -0,0 +1,96 @@
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+from src.config import Config
+from src.backends import ScoredChunk
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased alphanumeric tokens, so course codes like "WIX1002" stay whole.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring, partitioned by the chunk's source filename.
+
+    {filename: {"ids": [...], "payloads": [...], "lengths": [...], "postings": {term: [[doc, tf], ...]}}}
+    """
+    def __init__(self, partitions: Dict[str, dict] = None, k1: float = 1.5, b: float = 0.75):
+        self.partitions = partitions or {}
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def build(cls, points: Iterable[Tuple[str, dict]]) -> "BM25Index":
+        """
+        Build the index from (point_id, payload) pairs.
+        """
+        partitions = {}
+        for point_id, payload in points:
+            filename = payload.get("metadata", {}).get("filename", "")
+            partition = partitions.setdefault(filename, {"ids": [], "payloads": [], "lengths": [], "postings": {}})
+            doc = len(partition["ids"])
+            tokens = tokenize(payload.get("text", ""))
+            partition["ids"].append(point_id)
+            partition["payloads"].append(payload)
+            partition["lengths"].append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                partition["postings"].setdefault(term, []).append([doc, tf])
+        return cls(partitions)
+
+    def search(self, query: str, filename: str, top_k: int) -> List[ScoredChunk]:
+        partition = self.partitions.get(filename)
+        if not partition or not partition["ids"]:
+            return []
+        num_docs = len(partition["ids"])
+        avg_length = sum(partition["lengths"]) / num_docs or 1.0
+
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = partition["postings"].get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * partition["lengths"][doc] / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return [
+            ScoredChunk(id=partition["ids"][doc], score=score, payload=partition["payloads"][doc])
+            for doc, score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        ]
+
+    def save(self, path: str = Config.BM25_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.partitions, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = Config.BM25_INDEX_PATH) -> "BM25Index":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def reciprocal_rank_fusion(result_lists: List[List[ScoredChunk]], top_k: int, k: int = Config.RRF_K) -> List[ScoredChunk]:
+    """
+    Merge ranked lists by summing 1 / (k + rank) for every list a chunk appears in.
+    """
+    scores, chunks = {}, {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, start=1):
+            scores[chunk.id] = scores.get(chunk.id, 0.0) + 1.0 / (k + rank)
+            chunks.setdefault(chunk.id, chunk)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [ScoredChunk(id=point_id, score=scores[point_id], payload=chunks[point_id].payload) for point_id in ranked]
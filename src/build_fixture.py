@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config import Config
+from src.embedder import Embedder
+from src.backends import LocalBackend
+from src.bm25 import BM25Index
+from src.chunker import MarkdownChunker, chunk_settings, settings_key
+from src.manifest import point_id, text_hash
+from src.parse_cache import ParseCache, cache_key
+
+QUERY_VECTORS_FILE = "query_vectors.json"
+
+def pages_from_file(path: str) -> List[Dict]:
+    """
+    Pages from a JSON list of {"filename", "page", "text"} records.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def pages_from_parse_cache(data_path: str = Config.DATA_PATH) -> List[Dict]:
+    """
+    Pages of every PDF in `data_path` that has a cached parse; no LlamaParse calls are made.
+    """
+    parse_cache = ParseCache()
+    pages = []
+    for filepath in sorted(Path(data_path).iterdir()):
+        if filepath.suffix.lower() != ".pdf":
+            continue
+        nodes = parse_cache.get(cache_key(filepath))
+        if nodes is None:
+            print(f"Skipping {filepath.name}: not in the parse cache")
+            continue
+        pages.extend({"filename": filepath.name, "page": page, "text": node["text"]} for page, node in enumerate(nodes, start=1))
+    return pages
+
+def build_fixture(pages: List[Dict], questions: List[str], output: str):
+    """
+    Chunk, embed and index `pages` into `output` (local/ and bm25.json, the layout
+    benchmark.py --index expects) and store the embeddings of `questions`, so the
+    benchmark can run without loading the embedding model.
+    """
+    embedder = Embedder()
+    chunker = MarkdownChunker()
+    key = settings_key(chunk_settings())
+    ids, texts, payloads = [], [], []
+    for page in pages:
+        page_hash = text_hash(page["text"])
+        parent_id = point_id(page["filename"], page["page"], page_hash)
+        for index, text in enumerate(chunker.split(page["text"])):
+            ids.append(point_id(page["filename"], page["page"], page_hash, key, index))
+            texts.append(text)
+            payloads.append({
+                "text": text,
+                "metadata": {
+                    "filename": page["filename"],
+                    "page": page["page"],
+                    "page_hash": page_hash,
+                    "parent_id": parent_id,
+                    "chunk": index,
+                },
+            })
+
+    backend = LocalBackend(path=os.path.join(output, "local"))
+    backend.clear()
+    backend.upsert(ids, embedder.generate_embeddings(texts), payloads)
+    BM25Index.build(backend.iter_points()).save(os.path.join(output, "bm25.json"))
+
+    questions = sorted(set(questions))
+    with open(os.path.join(output, QUERY_VECTORS_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": Config.EMBED_MODEL_NAME,
+            "vectors": dict(zip(questions, embedder.generate_embeddings(questions))),
+        }, f)
+    print(f"Built fixture in {output}: {len(pages)} pages, {len(ids)} chunks, {len(questions)} query vectors")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline retrieval benchmark fixture.")
+    parser.add_argument("--pages", default="evaluation/fixture/pages.json", help="JSON list of parsed pages (the default is a smoke-test subset)")
+    parser.add_argument("--parse-cache", action="store_true", help="read pages from the parse cache of DATA_PATH instead")
+    parser.add_argument("--benchmark", default="evaluation/evaluation_benchmark.json", help="questions to precompute vectors for")
+    parser.add_argument("--output", default="index/fixture")
+    args = parser.parse_args()
+
+    pages = pages_from_parse_cache() if args.parse_cache else pages_from_file(args.pages)
+    if not args.parse_cache:
+        print("Note: a page subset gives smoke-test recall only; use --parse-cache to index whole handbooks")
+    with open(args.benchmark, "r") as f:
+        questions = [test_case["user_input"] for test_case in json.load(f)]
+    build_fixture(pages, questions, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+import numpy as np
+from src.config import Config
+from src.metrics import metrics
+
+@dataclass
+class CacheEntry:
+    course: str
+    answer: str
+    contexts: List[str]
+    embedding: Optional[np.ndarray]
+    latency: float
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class ResponseCache:
+    """
+    Answer cache scoped per course. Lookups try the exact normalized query first,
+    then the nearest cached query embedding above a cosine similarity threshold.
+    Entries expire after a TTL and the least recently used ones are evicted once
+    the cache is full.
+    """
+    def __init__(
+        self,
+        max_size: int = Config.RESPONSE_CACHE_MAX_SIZE,
+        ttl: float = Config.RESPONSE_CACHE_TTL,
+        similarity_threshold: float = Config.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        query = re.sub(r"\s+", " ", query.lower()).strip()
+        return query.strip("?!. ")
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl
+
+    def _record_hit(self, key, entry: CacheEntry):
+        self._entries.move_to_end(key)
+        self.latency_saved += entry.latency
+
+    def get_exact(self, course: str, query: str) -> Optional[CacheEntry]:
+        """
+        Look up an answer by exact normalized query. Misses are not counted here,
+        since an exact miss is normally followed by a semantic lookup.
+        """
+        key = (course, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry):
+                del self._entries[key]
+                return None
+            self.exact_hits += 1
+            self._record_hit(key, entry)
+            return entry
+
+    def get_similar(self, course: str, embedding) -> Optional[CacheEntry]:
+        """
+        Look up the most similar cached query for the course by embedding.
+        """
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if self._is_expired(e)]:
+                del self._entries[key]
+            candidates = [(k, e) for k, e in self._entries.items() if k[0] == course and e.embedding is not None]
+            if candidates:
+                similarities = np.stack([e.embedding for _, e in candidates]) @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key, entry = candidates[best]
+                    self.semantic_hits += 1
+                    self._record_hit(key, entry)
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, course: str, query: str, embedding, answer: str, contexts: List[str], latency: float):
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+        entry = CacheEntry(course=course, answer=answer, contexts=contexts, embedding=embedding, latency=latency)
+        key = (course, self.normalize(query))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """
+        Drop every entry, e.g. after the indexed corpus changes.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "latency_saved_seconds": self.latency_saved,
+        }
+
+
+response_cache = ResponseCache()
+metrics.register_gauges("response_cache", response_cache.stats)
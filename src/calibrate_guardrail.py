@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config import Config
+from src.embedder import Embedder
+
+def suggest_thresholds(benign: List[float], unsafe: List[float], margin: float = 0.05) -> Dict[str, float]:
+    """
+    Thresholds for the guardrail embedding tier from the max-similarity scores of benign
+    questions and of held-out unsafe examples. The safe threshold sits `margin` below the
+    lowest unsafe score, so no known unsafe message is cleared without the LLM; the unsafe
+    threshold sits `margin` above the highest benign score, so no known benign question is
+    flagged. The coverage fields report how much of each set the local tier would decide.
+    """
+    benign, unsafe = np.asarray(benign), np.asarray(unsafe)
+    safe_threshold = float(unsafe.min()) - margin
+    unsafe_threshold = float(benign.max()) + margin
+    return {
+        "safe_threshold": safe_threshold,
+        "unsafe_threshold": unsafe_threshold,
+        "benign_cleared": float((benign < safe_threshold).mean()),
+        "unsafe_flagged": float((unsafe >= unsafe_threshold).mean()),
+    }
+
+def max_similarities(queries: np.ndarray, examples: np.ndarray) -> np.ndarray:
+    return (queries @ examples.T).max(axis=1)
+
+def leave_one_out_similarities(examples: np.ndarray) -> np.ndarray:
+    """
+    Score each unsafe example against the others, as an unseen attack would be scored.
+    """
+    similarities = examples @ examples.T
+    np.fill_diagonal(similarities, -np.inf)
+    return similarities.max(axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest GUARDRAIL_SAFE_THRESHOLD and GUARDRAIL_UNSAFE_THRESHOLD.")
+    parser.add_argument("--benign", nargs="+", default=["evaluation/evaluation_benchmark.json"],
+                        help="JSON lists of benign questions (user_input or question keys)")
+    parser.add_argument("--examples", default=Config.GUARDRAIL_EXAMPLES_PATH)
+    parser.add_argument("--margin", type=float, default=0.05)
+    args = parser.parse_args()
+
+    questions = []
+    for path in args.benign:
+        with open(path, "r", encoding="utf-8") as f:
+            questions.extend(item.get("user_input") or item["question"] for item in json.load(f))
+    with open(args.examples, "r", encoding="utf-8") as f:
+        examples = [line.strip() for line in f if line.strip()]
+
+    embedder = Embedder()
+    example_vectors = np.asarray(embedder.generate_embeddings(examples), dtype=np.float32)
+    question_vectors = np.asarray(embedder.generate_embeddings(questions), dtype=np.float32)
+    result = suggest_thresholds(
+        max_similarities(question_vectors, example_vectors),
+        leave_one_out_similarities(example_vectors),
+        args.margin,
+    )
+    print(f"{len(questions)} benign questions, {len(examples)} unsafe examples")
+    print(f"GUARDRAIL_SAFE_THRESHOLD={result['safe_threshold']:.3f}  (clears {result['benign_cleared']:.0%} of benign questions)")
+    print(f"GUARDRAIL_UNSAFE_THRESHOLD={result['unsafe_threshold']:.3f}  (flags {result['unsafe_flagged']:.0%} of held-out unsafe examples)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from src.config import Config
+from src.embedder import Embedder
+from src.manifest import point_id
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def chunk_settings() -> Dict:
+    """
+    Settings that change how pages are split; part of every chunk ID and recorded
+    in the manifest, so changing them re-chunks the corpus on the next sync.
+    """
+    return {
+        "strategy": Config.CHUNK_STRATEGY,
+        "max_tokens": Config.CHUNK_MAX_TOKENS,
+        "overlap_tokens": Config.CHUNK_OVERLAP_TOKENS,
+        "tokenizer": Config.EMBED_MODEL_NAME,
+    }
+
+def settings_key(settings: Dict) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class MarkdownChunker:
+    """
+    Splits a markdown page into chunks of at most `max_tokens` embedding-model tokens.
+    Headings start new sections and are repeated at the top of every chunk in their
+    section, tables are only split between rows (with the header rows repeated), and
+    consecutive chunks share up to `overlap_tokens` of trailing blocks.
+    """
+    def __init__(
+        self,
+        max_tokens: int = Config.CHUNK_MAX_TOKENS,
+        overlap_tokens: int = Config.CHUNK_OVERLAP_TOKENS,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens or self._count_model_tokens
+
+    @staticmethod
+    def _count_model_tokens(text: str) -> int:
+        return len(Embedder.get_model().tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _blocks(self, text: str) -> List[tuple]:
+        """
+        Split markdown into (heading, block) pairs: paragraphs, list runs and whole
+        tables, each tagged with the heading of the section it belongs to.
+        """
+        blocks, heading, lines, in_table = [], "", [], False
+
+        def flush():
+            if lines and "".join(lines).strip():
+                blocks.append((heading, "\n".join(lines).strip()))
+            lines.clear()
+
+        for line in text.splitlines():
+            is_table_row = line.lstrip().startswith("|")
+            if line.lstrip().startswith("#"):
+                flush()
+                heading = line.strip()
+                in_table = False
+            elif is_table_row != in_table:
+                flush()
+                lines.append(line)
+                in_table = is_table_row
+            elif not line.strip() and not in_table:
+                flush()
+            else:
+                lines.append(line)
+        flush()
+        return blocks
+
+    def _split_block(self, block: str, budget: int) -> List[str]:
+        """
+        Break a block that does not fit in `budget` tokens: tables by rows with the
+        header repeated, prose by sentences and then by words.
+        """
+        if self.count_tokens(block) <= budget:
+            return [block]
+        if block.lstrip().startswith("|"):
+            rows = block.splitlines()
+            header = rows[:2] if len(rows) > 2 and set(rows[1].replace("|", "").strip()) <= set("-: ") else rows[:1]
+            units, joiner, prefix = rows[len(header):], "\n", "\n".join(header)
+        else:
+            units = SENTENCE_BOUNDARY.split(block)
+            if len(units) == 1:
+                units = block.split()
+            joiner, prefix = (" ", "")
+
+        pieces, current = [], []
+        for unit in units:
+            candidate = joiner.join(([prefix] if prefix else []) + current + [unit])
+            if current and self.count_tokens(candidate) > budget:
+                pieces.append(joiner.join(([prefix] if prefix else []) + current))
+                current = []
+            current.append(unit)
+        if current:
+            pieces.append(joiner.join(([prefix] if prefix else []) + current))
+        # a single sentence can still be too long; fall back to words for those
+        return [p for piece in pieces for p in (
+            self._split_block(piece, budget) if self.count_tokens(piece) > budget and piece != block else [piece]
+        )]
+
+    def split(self, text: str) -> List[str]:
+        chunks, current, current_heading = [], [], None
+
+        def emit():
+            if current:
+                body = "\n\n".join(block for block, _ in current)
+                chunks.append(f"{current_heading}\n\n{body}" if current_heading else body)
+
+        for heading, block in self._blocks(text):
+            heading_tokens = self.count_tokens(heading) if heading else 0
+            for piece in self._split_block(block, self.max_tokens - heading_tokens):
+                tokens = self.count_tokens(piece)
+                used = sum(t for _, t in current)
+                if current and (heading != current_heading or used + tokens + heading_tokens > self.max_tokens):
+                    emit()
+                    # carry trailing blocks of the same section over as overlap
+                    overlap, overlap_tokens = [], 0
+                    if heading == current_heading:
+                        for previous in reversed(current):
+                            if overlap_tokens + previous[1] + tokens + heading_tokens > self.max_tokens:
+                                break
+                            if overlap_tokens + previous[1] > self.overlap_tokens:
+                                break
+                            overlap.insert(0, previous)
+                            overlap_tokens += previous[1]
+                    current = overlap
+                current_heading = heading
+                current.append((piece, tokens))
+        emit()
+        return chunks or [text]
+
+    def chunk_document(self, page) -> list:
+        """
+        Split a page document into chunk documents linked to it by `parent_id`.
+        """
+        from llama_index.core import Document
+        metadata = page.metadata
+        key = settings_key(chunk_settings())
+        return [
+            Document(
+                id_=point_id(metadata["filename"], metadata["page"], metadata["page_hash"], key, index),
+                text=text,
+                metadata={**metadata, "parent_id": page.id_, "chunk": index},
+            )
+            for index, text in enumerate(self.split(page.text))
+        ]
+
+
+def chunk_page(page, chunker: Optional[MarkdownChunker] = None) -> list:
+    """
+    Apply the configured CHUNK_STRATEGY: whole pages, or markdown-aware sub-page chunks.
+    """
+    if Config.CHUNK_STRATEGY == "page":
+        page.metadata = {**page.metadata, "parent_id": page.id_, "chunk": 0}
+        return [page]
+    return (chunker or MarkdownChunker()).chunk_document(page)
+
+
+class ParentStore:
+    """
+    Full page texts keyed by parent ID, used to expand retrieved chunks to their page.
+    Stored as one JSON file next to the index and reloaded when an ingest run rewrites it.
+    """
+    def __init__(self, path: str = Config.PARENT_STORE_PATH):
+        self.path = path
+        self._pages = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            if self._pages is None or mtime != self._mtime:
+                if mtime is None:
+                    self._pages = {}
+                else:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._pages = json.load(f)
+                self._mtime = mtime
+            return self._pages
+
+    def get(self, parent_id: str) -> Optional[str]:
+        page = self._load().get(parent_id)
+        return page["text"] if page else None
+
+    def update(self, pages: Dict[str, dict], live_ids=None):
+        """
+        Add or replace pages and, if `live_ids` is given, drop every page not in it.
+        """
+        stored = dict(self._load())
+        stored.update(pages)
+        if live_ids is not None:
+            stored = {parent_id: page for parent_id, page in stored.items() if parent_id in live_ids}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._pages, self._mtime = stored, os.path.getmtime(self.path)
+
+    def clear(self):
+        self.update({}, live_ids=set())
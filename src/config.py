@@ -6,21 +6,113 @@ load_dotenv()
 class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-2.0-flash-lite")
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 1000000))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 2))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 60))
+
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")  # "qdrant" or "local"
+    LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "./index/local")
+    LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # "float32" or "float16"
 
     QDRANT_HOST =  os.getenv("MILVUS_HOST", "localhost")
     QDRANT_PORT = int(os.getenv("MILVUS_PORT", "6333"))
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
     COHERE_API_KEY= os.getenv("COHERE_API_KEY")
     COLLECTION_NAME = os.getenv("COLLECTION_NAME", "Repository")
+    QDRANT_ASYNC = os.getenv("QDRANT_ASYNC", "true").lower() == "true"  # query through AsyncQdrantClient
+    QDRANT_PARTITIONING = os.getenv("QDRANT_PARTITIONING", "none")  # "none" or "collection" (one collection per course file)
+    QDRANT_FILENAME_INDEX = os.getenv("QDRANT_FILENAME_INDEX", "true").lower() == "true"  # keyword index on metadata.filename
+    QDRANT_FILENAME_IS_TENANT = os.getenv("QDRANT_FILENAME_IS_TENANT", "true").lower() == "true"  # co-locate each course's points
+    QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")  # "none", "int8" or "binary"
+    QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    QDRANT_RESCORE = os.getenv("QDRANT_RESCORE", "true").lower() == "true"  # rescore quantized hits with full vectors
+    QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", 2.0))
+    QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "false").lower() == "true"  # keep full vectors on disk (pairs with quantization)
+    QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", 16))
+    QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100))
+    QDRANT_SEARCH_EF = int(os.getenv("QDRANT_SEARCH_EF", 0))  # 0 uses the server default
     
     RETRIEVE_TOP_K = int(os.getenv("RETRIEVE_TOP_K", 8))
     RERANK_TOP_P = int(os.getenv("RERANK_TOP_P", 5))
+    RERANK_THRESHOLD = float(os.getenv("RERANK_THRESHOLD", 0.1))
+    RERANKER = os.getenv("RERANKER", "cohere")  # "cohere" or "cross-encoder"
+    RERANKER_FALLBACK = os.getenv("RERANKER_FALLBACK", "")  # reranker to use if the primary one fails
+    CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    CROSS_ENCODER_BATCH_SIZE = int(os.getenv("CROSS_ENCODER_BATCH_SIZE", 64))
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "./index/bm25.json")
+    RRF_K = int(os.getenv("RRF_K", 60))
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "chunk")  # "chunk" or "parent" (expand hits to their full page)
+    CONTEXT_PACKING_ENABLED = os.getenv("CONTEXT_PACKING_ENABLED", "true").lower() == "true"
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 2000))  # estimated tokens of context in the answer prompt
+    CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", 0.8))  # shingle overlap that marks a near-duplicate
+    CONTEXT_BOILERPLATE_MIN_REPEATS = int(os.getenv("CONTEXT_BOILERPLATE_MIN_REPEATS", 3))  # contexts a line must repeat in to be stripped
+    CONTEXT_MIN_TOKENS = int(os.getenv("CONTEXT_MIN_TOKENS", 64))  # smallest truncated context worth keeping
+
+    REFORMULATE_POLICY = os.getenv("REFORMULATE_POLICY", "heuristic")  # "heuristic" or "always"
+    REFORMULATE_SHORT_QUERY_WORDS = int(os.getenv("REFORMULATE_SHORT_QUERY_WORDS", 3))
+    REFORMULATE_MEMO_SIZE = int(os.getenv("REFORMULATE_MEMO_SIZE", 1024))
+    REFORMULATE_MEMO_HISTORY_TURNS = int(os.getenv("REFORMULATE_MEMO_HISTORY_TURNS", 2))
+
+    GUARDRAIL_EMBEDDING_ENABLED = os.getenv("GUARDRAIL_EMBEDDING_ENABLED", "true").lower() == "true"
+    GUARDRAIL_SAFE_THRESHOLD = float(os.getenv("GUARDRAIL_SAFE_THRESHOLD", -1))  # below: safe without the LLM; -1 disables, see src/calibrate_guardrail.py
+    GUARDRAIL_UNSAFE_THRESHOLD = float(os.getenv("GUARDRAIL_UNSAFE_THRESHOLD", 0.75))  # at or above: unsafe without the LLM
+    GUARDRAIL_CACHE_SIZE = int(os.getenv("GUARDRAIL_CACHE_SIZE", 4096))
+    GUARDRAIL_FAIL_OPEN = os.getenv("GUARDRAIL_FAIL_OPEN", "true").lower() == "true"
+
+    HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", 4))  # recent turns kept verbatim
+    HISTORY_FOLD_STRIDE = int(os.getenv("HISTORY_FOLD_STRIDE", 4))  # older turns are folded into the summary this many at a time
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 2000))  # estimated tokens for the verbatim turns
+    HISTORY_SUMMARY_MAX_WORDS = int(os.getenv("HISTORY_SUMMARY_MAX_WORDS", 150))
+    HISTORY_SUMMARY_CACHE_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", 1024))
+
+    FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+    FAQ_DIR = os.getenv("FAQ_DIR", "./faq")  # drop-in *.json files of {"course", "question", "answer"}
+    FAQ_INDEX_PATH = os.getenv("FAQ_INDEX_PATH", "./index/faq.json")
+    FAQ_SIMILARITY_THRESHOLD = float(os.getenv("FAQ_SIMILARITY_THRESHOLD", 0.92))
+    FAQ_RELOAD_INTERVAL = float(os.getenv("FAQ_RELOAD_INTERVAL", 5))  # seconds between checks for changed FAQ files
+
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 1024))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 24 * 60 * 60))
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", 0.95))
     
+    EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "all-MiniLM-L6-v2")
+    EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")  # "torch", "onnx" or "onnx-int8" (onnx needs optimum[onnxruntime])
+    EMBED_ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+    EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 2048))
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+    EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", 1))
+
     DATA_PATH = os.getenv("DATA_PATH", "./data")
+    CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "markdown")  # "markdown" (sub-page chunks) or "page"
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 200))  # embedding-model tokens; MiniLM truncates at 256
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 40))
+    PARENT_STORE_PATH = os.getenv("PARENT_STORE_PATH", "./index/parents.json")
+    MANIFEST_PATH = os.getenv("MANIFEST_PATH", "./index/manifest.json")
+    PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true"
+    PARSE_CACHE_ONLY = os.getenv("PARSE_CACHE_ONLY", "false").lower() == "true"
+    PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", "./index/parse_cache")
     GUARDRAIL_PATH = os.getenv("GUARDRAIL_PATH", "src/prompts/guardrail_prompt.txt")
+    GUARDRAIL_EXAMPLES_PATH = os.getenv("GUARDRAIL_EXAMPLES_PATH", "src/prompts/unsafe_examples.txt")
     QA_PROMPT_PATH = os.getenv("QA_PROMPT_PATH", "src/prompts/qa_prompt.txt")
     REFORMULATE_PROMPT_PATH = os.getenv("REFORMULATE_PROMPT_PATH", "src/prompts/reformulate_prompt.txt")
+    SUMMARIZE_PROMPT_PATH = os.getenv("SUMMARIZE_PROMPT_PATH", "src/prompts/summarize_prompt.txt")
     
+    GRADIO_CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", 32))  # chats answered at once
+    GRADIO_MAX_WAITING = int(os.getenv("GRADIO_MAX_WAITING", 64))  # chats waiting for a slot; beyond this, new chats get a busy reply
+
+    PRELOAD_WORKERS = int(os.getenv("PRELOAD_WORKERS", 6))  # threads used by `app.py --preload`
+
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # e.g. 9464 to serve /metrics; 0 disables the endpoint
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # unauthenticated, so only bind beyond localhost behind a firewall
+
+    EVAL_MAX_WORKERS = int(os.getenv("EVAL_MAX_WORKERS", 4))
+    EVAL_PROGRESS_PATH = os.getenv("EVAL_PROGRESS_PATH", "evaluation_progress.jsonl")
+
     COURSE_TO_FILE_MAP = {
         "Computer Science": "computer_science.pdf",
         "Electrical Engineering": "electrical_engineering.pdf",
@@ -0,0 +1,141 @@
+import re
+import logging
+from collections import Counter
+from typing import List
+from src.config import Config
+from src.history import estimate_tokens
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PAGE_NUMBER_LINE = re.compile(r"^\s*(page\s*)?\d+(\s*(of|/)\s*\d+)?\s*$", re.IGNORECASE)
+
+def _normalize_line(line: str) -> str:
+    return re.sub(r"\s+", " ", line.strip().lower())
+
+def _is_structural(line: str) -> bool:
+    """
+    Headings and table rows are repeated on purpose (the chunker copies them into
+    every chunk of a section or table), so they are never treated as boilerplate.
+    """
+    stripped = line.lstrip()
+    return stripped.startswith("#") or stripped.startswith("|")
+
+
+class ContextPacker:
+    """
+    Assembles the retrieved contexts for the answer prompt. Contexts arrive best first;
+    lines repeated across several of them (running headers, footers, page numbers) are
+    stripped, contexts that are near-duplicates of a better one are dropped, and the
+    rest are packed in order under a token budget.
+    """
+    def __init__(
+        self,
+        token_budget: int = Config.CONTEXT_TOKEN_BUDGET,
+        duplicate_threshold: float = Config.CONTEXT_DUPLICATE_THRESHOLD,
+        boilerplate_min_repeats: int = Config.CONTEXT_BOILERPLATE_MIN_REPEATS,
+        min_tokens: int = Config.CONTEXT_MIN_TOKENS,
+        shingle_size: int = 3,
+    ):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.boilerplate_min_repeats = boilerplate_min_repeats
+        self.min_tokens = min_tokens
+        self.shingle_size = shingle_size
+
+    def strip_boilerplate(self, contexts: List[str]) -> List[str]:
+        line_counts = Counter(
+            line for context in contexts
+            for line in {_normalize_line(l) for l in context.splitlines() if l.strip() and not _is_structural(l)}
+        )
+        boilerplate = {line for line, count in line_counts.items() if count >= self.boilerplate_min_repeats}
+        stripped = []
+        for context in contexts:
+            lines = [
+                line for line in context.splitlines()
+                if _is_structural(line) or (_normalize_line(line) not in boilerplate and not PAGE_NUMBER_LINE.match(line))
+            ]
+            stripped.append(re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip())
+        return stripped
+
+    def shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def is_near_duplicate(self, candidate: set, kept: List[set]) -> bool:
+        """
+        A context is a near-duplicate if its word shingles mostly overlap a kept context:
+        by Jaccard similarity, or by containment when it is a fragment of a longer one
+        (e.g. an overlapping chunk of a page that is already included).
+        """
+        if not candidate:
+            return True
+        for other in kept:
+            overlap = len(candidate & other)
+            if overlap / len(candidate | other) >= self.duplicate_threshold:
+                return True
+            if overlap / len(candidate) >= self.duplicate_threshold:
+                return True
+        return False
+
+    def _truncate(self, context: str, budget: int) -> str:
+        """
+        Keep whole lines while they fit, then as many words of the next line as fit.
+        """
+        lines, used = [], 0
+        for line in context.splitlines():
+            tokens = estimate_tokens(line)
+            if used + tokens > budget:
+                words, text = [], ""
+                for word in line.split():
+                    text = f"{text} {word}" if text else word
+                    if used + estimate_tokens(text) > budget:
+                        break
+                    words.append(word)
+                if words:
+                    lines.append(" ".join(words) + " …")
+                break
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines).strip()
+
+    def pack(self, contexts: List[str]) -> List[str]:
+        if not contexts:
+            return contexts
+        tokens_before = sum(estimate_tokens(context) for context in contexts)
+
+        kept, kept_shingles, duplicates = [], [], 0
+        for context in self.strip_boilerplate(contexts):
+            shingles = self.shingles(context)
+            if self.is_near_duplicate(shingles, kept_shingles):
+                duplicates += 1
+                continue
+            kept.append(context)
+            kept_shingles.append(shingles)
+
+        packed, used, over_budget = [], 0, 0
+        for context in kept:
+            tokens = estimate_tokens(context)
+            remaining = self.token_budget - used
+            if tokens > remaining:
+                over_budget += 1
+                if remaining < self.min_tokens:
+                    continue
+                context = self._truncate(context, remaining)
+                if not context:
+                    continue
+                tokens = estimate_tokens(context)
+            packed.append(context)
+            used += tokens
+
+        metrics.inc("rag_context_tokens_total", tokens_before, stage="retrieved")
+        metrics.inc("rag_context_tokens_total", used, stage="packed")
+        metrics.inc("rag_context_dropped_total", duplicates, reason="duplicate")
+        metrics.inc("rag_context_dropped_total", over_budget, reason="budget")
+        logger.debug(
+            "Packed %d/%d contexts, ~%d -> ~%d tokens (%d duplicates, %d over budget)",
+            len(packed), len(contexts), tokens_before, used, duplicates, over_budget,
+        )
+        return packed
@@ -1,17 +1,103 @@
 import os
-from sentence_transformers import SentenceTransformer
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List
+from src.config import Config
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 class Embedder():
-    
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    
+    """
+    Thin handle on a process-wide embedding model. The model is loaded lazily on first
+    use and shared by every instance, as is the LRU cache of query embeddings.
+    """
+    _model = None
+    _model_lock = threading.Lock()
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
     def __init__(self):
         os.environ["TOKENIZERS_PARALLELISM"] = "false"
-        self.dimension = 384 
-    
+        self.dimension = 384
+
+    @property
+    def model(self) -> "SentenceTransformer":
+        return self.get_model()
+
+    @classmethod
+    def get_model(cls) -> "SentenceTransformer":
+        if cls._model is None:
+            with cls._model_lock:
+                if cls._model is None:
+                    cls._model = cls._load_model()
+        return cls._model
+
+    @staticmethod
+    def _load_model() -> "SentenceTransformer":
+        """
+        Load the model with the configured backend: plain PyTorch, ONNX Runtime, or an
+        int8-quantized ONNX export for faster CPU inference. sentence_transformers (and
+        torch) are only imported here, on first use.
+        """
+        from sentence_transformers import SentenceTransformer
+        if Config.EMBED_BACKEND == "onnx":
+            return SentenceTransformer(Config.EMBED_MODEL_NAME, backend="onnx")
+        if Config.EMBED_BACKEND == "onnx-int8":
+            return SentenceTransformer(
+                Config.EMBED_MODEL_NAME,
+                backend="onnx",
+                model_kwargs={"file_name": Config.EMBED_ONNX_INT8_FILE},
+            )
+        return SentenceTransformer(Config.EMBED_MODEL_NAME)
+
+    def warmup(self):
+        """
+        Load the model and run one encode so the first real query does not pay for it.
+        """
+        self.model.encode(["warm up"])
+
     def generate_embedding(self, content: str):
-        return self.model.encode(content).tolist()
-    
+        """
+        Embed a single query, memoized in a bounded LRU cache.
+        """
+        with self._cache_lock:
+            embedding = self._cache.get(content)
+            if embedding is not None:
+                self._cache.move_to_end(content)
+                return list(embedding)
+
+        embedding = self.model.encode(content).tolist()
+        if Config.EMBED_CACHE_SIZE > 0:
+            with self._cache_lock:
+                self._cache[content] = embedding
+                while len(self._cache) > Config.EMBED_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return list(embedding)
+
+    def generate_embeddings(self, contents: List[str], batch_size: int = Config.EMBED_BATCH_SIZE, pool=None):
+        """
+        Encode a batch of texts in one call, optionally spread over a multi-process pool.
+        """
+        if pool is not None:
+            return self.model.encode_multi_process(contents, pool, batch_size=batch_size).tolist()
+        return self.model.encode(contents, batch_size=batch_size).tolist()
+
+    @contextmanager
+    def multi_process_pool(self, processes: int = Config.EMBED_PROCESSES):
+        """
+        Yield a CPU worker pool for encode_multi_process, or None when running single-process.
+        """
+        if processes <= 1:
+            yield None
+            return
+        pool = self.model.start_multi_process_pool(target_devices=["cpu"] * processes)
+        try:
+            yield pool
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
     @staticmethod
     def get_dimension():
-        return 384
\ No newline at end of file
+        return 384
@@ -1,8 +1,11 @@
 import os
 import sys
 import json
-import time
 import math
+import random
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from datasets import Dataset
 from ragas.metrics import (
@@ -18,95 +21,130 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from src.retriever import RAG
+from src.llm import RETRYABLE_STATUS_CODES
 from src.config import Config
+from src.ratelimit import AdaptiveConcurrencyLimiter
+from src import runner
+
+def question_key(test_case: Dict) -> str:
+    """
+    Stable checkpoint key for a benchmark question, independent of its position in the file.
+    """
+    return hashlib.sha256(f"{test_case['course']}\n{test_case['user_input']}".encode("utf-8")).hexdigest()
 
 class QAEvaluator:
     def __init__(self, config: Config):
         self.config = config
-        self.rag = RAG()
-        self.rate_limit_delay = 45
-        self.max_retries = 5 
+        # FAQ and cache hits would return stored answers without retrieval,
+        # so every benchmark question goes through the full pipeline
+        self.rag = RAG(faq_enabled=False, cache_enabled=False)
+        self.rate_limit_delay = 5
+        self.max_retries = 3  # for failures GeminiLLM does not retry itself
+        self.max_workers = config.EVAL_MAX_WORKERS
+        self.progress_file = config.EVAL_PROGRESS_PATH
         
     def load_test_data(self, test_file: str) -> List[Dict]:
         with open(test_file, 'r') as f:
             return json.load(f)
 
-    def get_response_with_retry(self, question: str, course: str, max_retries: int = 5) -> Dict:
-        for attempt in range(max_retries):
+    def load_progress(self) -> Dict[str, Dict]:
+        """
+        Read completed answers from the append-only JSONL checkpoint, keyed by question hash.
+        """
+        progress = {}
+        try:
+            with open(self.progress_file, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partially written last line from an interrupted run
+                    progress[record['key']] = record
+        except FileNotFoundError:
+            pass
+        return progress
+
+    async def get_response_with_retry(self, question: str, course: str, limiter: AdaptiveConcurrencyLimiter) -> Dict:
+        """
+        Answer one question. Quota and server errors were already retried with backoff
+        by GeminiLLM, so they only shrink the concurrency limit and give up on the
+        question (it is retried on the next run); other failures, such as an
+        unparseable answer, are retried here.
+        """
+        for attempt in range(self.max_retries):
             try:
-                response, contexts = self.rag.get_response_with_context(
-                    user_message=question,
-                    history=[],
-                    selected_course=course
-                )
-                time.sleep(self.rate_limit_delay)
+                async with limiter:
+                    response, contexts = await self.rag.aget_response_with_context(
+                        user_message=question,
+                        history=[],
+                        selected_course=course
+                    )
+                await limiter.record_success()
                 return {
                     "answer": response,
                     "contexts": contexts
                 }
             except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = self.rate_limit_delay * (2 ** attempt)  # Exponential backoff
+                if getattr(e, "code", None) in RETRYABLE_STATUS_CODES:
+                    await limiter.record_failure()
+                    print(f"LLM error after retries: {str(e)} (concurrency {limiter.limit})")
+                    break
+                if attempt < self.max_retries - 1:
+                    wait_time = self.rate_limit_delay * (2 ** attempt) * random.uniform(0.5, 1)
                     print(f"Error occurred: {str(e)}")
-                    print(f"Waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}...")
-                    time.sleep(wait_time)
+                    print(f"Waiting {wait_time:.1f} seconds before retry {attempt + 1}/{self.max_retries}...")
+                    await asyncio.sleep(wait_time)
                 else:
-                    print(f"Failed to get response after {max_retries} attempts: {str(e)}")
-                    return {
-                        "answer": "ERROR: Failed to get response",
-                        "contexts": []
-                    }
+                    print(f"Failed to get response after {self.max_retries} attempts: {str(e)}")
+        return {
+            "answer": "ERROR: Failed to get response",
+            "contexts": []
+        }
 
-    def prepare_dataset(self, test_data: List[Dict]) -> Dataset:
-        questions, ground_truths, contexts, answers, courses = [], [], [], [], []
-        progress_file = 'evaluation_progress.json'
+    async def run_questions(self, pending: List[Dict]) -> None:
+        """
+        Answer the pending questions concurrently, appending each result to the checkpoint.
+        """
+        limiter = AdaptiveConcurrencyLimiter(self.max_workers)
+        completed = 0
+
+        async def answer(test_case: Dict):
+            nonlocal completed
+            response_data = await self.get_response_with_retry(test_case['user_input'], test_case['course'], limiter)
+            if response_data["answer"].startswith("ERROR:"):
+                return  # not checkpointed, so it is retried on the next run
+            with open(self.progress_file, 'a') as f:
+                f.write(json.dumps({
+                    'key': question_key(test_case),
+                    'question': test_case['user_input'],
+                    'course': test_case['course'],
+                    'answer': response_data["answer"],
+                    'contexts': response_data["contexts"],
+                }) + "\n")
+            completed += 1
+            print(f"Processed question {completed}/{len(pending)}")
+
+        await asyncio.gather(*(answer(test_case) for test_case in pending))
 
-        # Try to load previous progress
-        try:
-            with open(progress_file, 'r') as f:
-                progress = json.load(f)
-                questions = progress.get('questions', [])
-                ground_truths = progress.get('ground_truths', [])
-                contexts = progress.get('contexts', [])
-                answers = progress.get('answers', [])
-                courses = progress.get('courses', [])
-                start_idx = len(questions)
-        except FileNotFoundError:
-            start_idx = 0
-
-        total_questions = len(test_data)
-        for idx, test_case in enumerate(test_data[start_idx:], start_idx + 1):
-            print(f"Processing question {idx}/{total_questions}")
-            question = test_case['user_input']
-            ground_truth = test_case['expected_response']
-            course = test_case['course']
+    def prepare_dataset(self, test_data: List[Dict]) -> Dataset:
+        progress = self.load_progress()
+        pending = [test_case for test_case in test_data if question_key(test_case) not in progress]
+        print(f"{len(test_data) - len(pending)}/{len(test_data)} questions already answered, {len(pending)} to go")
+        if pending:
+            runner.run(self.run_questions(pending))
+            progress = self.load_progress()
 
-            try:
-                response_data = self.get_response_with_retry(question, course)
-                answer = response_data["answer"]
-                context = response_data["contexts"]
-
-                questions.append(question)
-                ground_truths.append(ground_truth)
-                contexts.append(context)
-                answers.append(answer)
-                courses.append(course)
-
-                # Save progress after each successful question
-                with open(progress_file, 'w') as f:
-                    json.dump({
-                        'questions': questions,
-                        'ground_truths': ground_truths,
-                        'contexts': contexts,
-                        'answers': answers,
-                        'courses': courses
-                    }, f)
-
-                if idx < total_questions:
-                    time.sleep(1)
-            except Exception as e:
-                print(f"Error processing question {idx}: {str(e)}")
+        questions, ground_truths, contexts, answers, courses = [], [], [], [], []
+        for test_case in test_data:
+            record = progress.get(question_key(test_case))
+            if record is None:
+                print(f"Skipping unanswered question: {test_case['user_input']}")
                 continue
+            questions.append(test_case['user_input'])
+            ground_truths.append(test_case['expected_response'])
+            contexts.append(record['contexts'])
+            answers.append(record['answer'])
+            courses.append(test_case['course'])
 
         return Dataset.from_dict({
             "question": questions,
@@ -127,22 +165,24 @@ class QAEvaluator:
         try:
             dataset = self.prepare_dataset(test_data)
 
-            metrics = [
-                Faithfulness(),
-                AnswerRelevancy(),
-                ContextRelevance(),
-                ContextRecall(),
-                ContextPrecision()
-            ]
-
-            # Evaluate each course separately
-            course_metrics = {}
-            for course in set(dataset['course']):
+            def evaluate_course(course):
                 print(f"\nEvaluating {course}...")
                 course_indices = [i for i, c in enumerate(dataset['course']) if c == course]
                 course_dataset = dataset.select(course_indices)
+                metrics = [
+                    Faithfulness(),
+                    AnswerRelevancy(),
+                    ContextRelevance(),
+                    ContextRecall(),
+                    ContextPrecision()
+                ]
                 course_result = evaluate(course_dataset, metrics=metrics)
-                course_metrics[course] = self.convert_metrics_to_dict(course_result)
+                return self.convert_metrics_to_dict(course_result)
+
+            # Evaluate each course separately, in parallel
+            courses = sorted(set(dataset['course']))
+            with ThreadPoolExecutor(max_workers=max(1, len(courses))) as executor:
+                course_metrics = dict(zip(courses, executor.map(evaluate_course, courses)))
 
             # Calculate overall metrics as average of course metrics
             overall_metrics = {}
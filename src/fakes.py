@@ -0,0 +1,65 @@
+import json
+import asyncio
+from types import SimpleNamespace
+from google.genai import errors
+
+class FakeGeminiClient:
+    """
+    Stand-in for genai.Client that answers after a fixed latency, so load tests and
+    unit tests exercise this process rather than the Gemini API. The first `failures`
+    calls raise a ClientError with `failure_code` (429 by default, like a quota error).
+    """
+    def __init__(self, latency: float = 0.0, stream_chunks: int = 10, failures: int = 0, failure_code: int = 429):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self.failures = failures
+        self.failure_code = failure_code
+        self.calls = 0
+        self.aio = SimpleNamespace(models=self)
+
+    def _maybe_fail(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise errors.ClientError(self.failure_code, {"error": {
+                "code": self.failure_code,
+                "status": "RESOURCE_EXHAUSTED",
+                "message": "Simulated quota error",
+            }})
+
+    @staticmethod
+    def _payload(contents) -> str:
+        text = contents if isinstance(contents, str) else json.dumps(contents)
+        if "reformulated_message" in text:
+            return json.dumps({"reformulated_message": "What are the core courses?"})
+        if '"status"' in text:
+            return json.dumps({"status": "SAFE"})
+        if '"summary"' in text:
+            return json.dumps({"summary": "The student asked about core courses."})
+        return json.dumps({"message": "The core courses are listed in the handbook. " * 5})
+
+    @staticmethod
+    def _response(text: str):
+        part = SimpleNamespace(text=text)
+        return SimpleNamespace(
+            text=text,
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))],
+            usage_metadata=None,
+        )
+
+    async def generate_content(self, model, contents, config):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        return self._response(self._payload(contents))
+
+    async def generate_content_stream(self, model, contents, config):
+        self._maybe_fail()
+        text = self._payload(contents)
+        size = -(-len(text) // self.stream_chunks)
+
+        async def chunks():
+            for i in range(0, len(text), size):
+                if self.latency:
+                    await asyncio.sleep(self.latency / self.stream_chunks)
+                yield self._response(text[i:i + size])
+        return chunks()
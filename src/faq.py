@@ -0,0 +1,168 @@
+import os
+import json
+import glob
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from src.config import Config
+from src.embedder import Embedder
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FAQEntry:
+    course: str
+    question: str
+    answer: str
+    source: str
+
+
+class FAQIndex(NamedTuple):
+    entries: List[FAQEntry]
+    vectors: np.ndarray
+    partitions: Dict[str, Tuple[int, int]]
+
+
+class FAQStore:
+    """
+    Curated question/answer pairs, embedded into a small per-course index and
+    matched by cosine similarity before the full RAG pipeline runs.
+
+    Entries come from every *.json file in FAQ_DIR, each a list of {"course",
+    "question", "answer"} objects (benchmark style "user_input"/"expected_response"
+    keys work too). The index is persisted to FAQ_INDEX_PATH and rebuilt whenever a
+    source file is added, changed or removed.
+    """
+    def __init__(
+        self,
+        faq_dir: str = Config.FAQ_DIR,
+        index_path: str = Config.FAQ_INDEX_PATH,
+        embedder: Optional[Embedder] = None,
+    ):
+        self.faq_dir = faq_dir
+        self.index_path = index_path
+        self.embedder = embedder or Embedder()
+        # swapped as a whole on reload, so lookups never see a half-built index
+        self.index = FAQIndex([], np.empty((0, Embedder.get_dimension()), dtype=np.float32), {})
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        metrics.register_gauges("faq", lambda: {"entries": len(self.index.entries)})
+
+    def source_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.faq_dir, "*.json")))
+
+    def signature(self) -> List[list]:
+        """
+        (path, mtime, size) of every source file; any difference triggers a rebuild.
+        """
+        return [[path, os.path.getmtime(path), os.path.getsize(path)] for path in self.source_paths()]
+
+    def _read_entries(self) -> List[FAQEntry]:
+        entries = []
+        for path in self.source_paths():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error("Skipping FAQ file %s: %s", path, e)
+                continue
+            for record in records:
+                question = record.get("question") or record.get("user_input")
+                answer = record.get("answer") or record.get("expected_response")
+                if record.get("course") in Config.COURSE_TO_FILE_MAP and question and answer:
+                    entries.append(FAQEntry(record["course"], question, answer, path))
+        # rows grouped by course, so each course is a contiguous partition
+        return sorted(entries, key=lambda entry: entry.course)
+
+    def build(self):
+        """
+        Embed every FAQ question and persist the index. Vectors of unchanged
+        questions are reused from the previous index.
+        """
+        signature = self.signature()
+        entries = self._read_entries()
+        known = {(entry.course, entry.question): vector for entry, vector in zip(self.index.entries, self.index.vectors)}
+        missing = [entry.question for entry in entries if (entry.course, entry.question) not in known]
+        embedded = iter(self.embedder.generate_embeddings(missing) if missing else [])
+
+        vectors = np.empty((len(entries), Embedder.get_dimension()), dtype=np.float32)
+        for i, entry in enumerate(entries):
+            vector = known.get((entry.course, entry.question))
+            vectors[i] = vector if vector is not None else next(embedded)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+        self._set(entries, vectors, signature)
+        self._save()
+        logger.info("Built FAQ index with %d entries (%d newly embedded).", len(entries), len(missing))
+        if not entries:
+            logger.info("No FAQ entries in %s; every question goes through the full pipeline.", self.faq_dir)
+
+    def _set(self, entries: List[FAQEntry], vectors: np.ndarray, signature):
+        partitions = {}
+        for i, entry in enumerate(entries):
+            start, _ = partitions.get(entry.course, (i, i))
+            partitions[entry.course] = (start, i + 1)
+        self.index = FAQIndex(entries, vectors, partitions)
+        self._signature = signature
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        np.save(self.index_path + ".npy", self.index.vectors)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "signature": self._signature,
+                "entries": [entry.__dict__ for entry in self.index.entries],
+            }, f)
+        os.replace(tmp_path, self.index_path)
+
+    def load(self):
+        """
+        Load the persisted index, rebuilding it if the sources changed since it was written.
+        """
+        if os.path.exists(self.index_path) and os.path.exists(self.index_path + ".npy"):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = [FAQEntry(**entry) for entry in data["entries"]]
+            self._set(entries, np.load(self.index_path + ".npy"), data["signature"])
+        if self._signature != self.signature():
+            self.build()
+
+    def refresh(self):
+        """
+        Hot-reload: rebuild when the FAQ files changed, checked at most every FAQ_RELOAD_INTERVAL seconds.
+        """
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < Config.FAQ_RELOAD_INTERVAL:
+            return
+        with self._lock:
+            if self._signature is not None and now - self._checked_at < Config.FAQ_RELOAD_INTERVAL:
+                return
+            if self._signature is None:
+                self.load()
+            elif self._signature != self.signature():
+                logger.info("FAQ sources changed, rebuilding the FAQ index.")
+                self.build()
+            self._checked_at = now
+
+    def match(self, course: str, query_vector, threshold: float = Config.FAQ_SIMILARITY_THRESHOLD) -> Optional[FAQEntry]:
+        """
+        Return the most similar FAQ entry for the course if it clears the threshold.
+        """
+        self.refresh()
+        entries, vectors, partitions = self.index
+        if course not in partitions:
+            return None
+        start, stop = partitions[course]
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        similarities = vectors[start:stop] @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return entries[start + best]
@@ -1,19 +1,58 @@
+import asyncio
 import gradio as gr
-from src.retriever import RAG
 from src.config import Config
+from src.metrics import metrics, start_metrics_server
+from src.services import services
+from src import runner
 
-rag = RAG()
+BUSY_MESSAGE = "⏳ The assistant is handling a lot of questions right now. Please try again in a moment."
 
-def chat_interface(user_input, history, selected_course):
-    response = rag.get_response(user_input, history, selected_course)
-    history.append((user_input, response))
-    
-    return "", history
+# Chats being answered, and chats waiting for one of the GRADIO_CONCURRENCY_LIMIT slots.
+# Handlers all run on the Gradio server's event loop, so plain counters are enough.
+in_flight = 0
+waiting = 0
+chat_slots = asyncio.Semaphore(Config.GRADIO_CONCURRENCY_LIMIT)
+metrics.register_gauges("gradio", lambda: {"in_flight": in_flight, "waiting": waiting})
+
+async def chat_interface(user_input, history, selected_course):
+    """
+    Stream the answer for one chat turn. The RAG pipeline runs on the shared runner
+    loop, so waiting on it never blocks the server. Each session's history lives in
+    its own gr.State and is replaced rather than mutated.
+
+    Chats queue here for a slot rather than in Gradio's queue, so the queue depth is
+    known: once GRADIO_MAX_WAITING chats are waiting, new ones get a busy reply.
+    """
+    global in_flight, waiting
+    past_turns = list(history)
+    if waiting >= Config.GRADIO_MAX_WAITING:
+        metrics.inc("rag_requests_total", outcome="shed")
+        yield "", past_turns + [(user_input, BUSY_MESSAGE)], past_turns
+        return
+
+    waiting += 1
+    try:
+        turns = past_turns + [(user_input, "")]
+        yield "", turns, past_turns
+        await chat_slots.acquire()
+    finally:
+        waiting -= 1
+    in_flight += 1
+    try:
+        async for partial_response in runner.aiterate(services.rag.astream_response(user_input, past_turns, selected_course)):
+            turns[-1] = (user_input, partial_response)
+            yield "", turns, turns
+    finally:
+        in_flight -= 1
+        chat_slots.release()
 
 def clear_history():
     return [], []
 
 def launch_ui():
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_PORT)
+
     with gr.Blocks(title="RAG QA Chatbot") as demo:
         gr.Markdown("# 📚 UM Faculty Handbook QA Bot\nAsk questions about your faculty handbook for the 2024/2025 academic session.")
 
@@ -23,14 +62,21 @@ def launch_ui():
                 label="Select Your Course/Faculty",
                 interactive=True,
         )
-            
+
         chatbot = gr.Chatbot()
         user_input = gr.Textbox(placeholder="Hi! How can I assist you today?", show_label=False)
 
-        state = gr.State([])  
+        state = gr.State([])
 
-        user_input.submit(chat_interface, inputs=[user_input, state, course_selector], outputs=[user_input, chatbot])
-        chatbot.clear(clear_history, outputs=[state, chatbot])  
+        user_input.submit(
+            chat_interface,
+            inputs=[user_input, state, course_selector],
+            outputs=[user_input, chatbot, state],
+            # admission is bounded by chat_slots and GRADIO_MAX_WAITING in the handler
+            concurrency_limit=None,
+        )
+        chatbot.clear(clear_history, outputs=[state, chatbot])
 
+    demo.queue()
     # demo.launch(share=True)
     demo.launch()
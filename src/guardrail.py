@@ -0,0 +1,135 @@
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import numpy as np
+from src.config import Config
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Jailbreak strings that are never part of a legitimate handbook question: a final UNSAFE verdict
+BLOCKLIST_PATTERNS = [
+    re.compile(r"\bDAN\b"),  # case-sensitive, so the name "Dan" does not match
+    re.compile(r"\bjail\s?break", re.IGNORECASE),
+    re.compile(r"\bdeveloper\s+mode\b", re.IGNORECASE),
+    re.compile(r"\bdo anything now\b", re.IGNORECASE),
+    re.compile(r"\bsystem\s+prompt\b", re.IGNORECASE),
+]
+
+# Wording common in attacks but also in ordinary questions ("shoot the short film",
+# "ignore the previous semester rules"): never decided locally, always sent to the LLM
+SUSPICIOUS_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"\b(ignore|disregard|forget)\b.{0,30}\b(previous|prior|above|earlier|all|your)\b.{0,20}\b(instructions?|rules|prompts?|guidelines)\b",
+        r"\b(hidden|initial)\s+(prompt|instructions?)\b",
+        r"\b(pretend|act)\s+(to be|as|like)\b.{0,40}\b(no|without)\b.{0,20}\b(rules|restrictions|filters?|limits?|policy)\b",
+        r"\b(kill|murder|shoot|stab)\s+(you|him|her|them|my|the|everyone)\b",
+        r"\b(make|build)\s+an?\s+(bomb|explosive)\b",
+    )
+]
+
+class Verdict(NamedTuple):
+    safe: bool
+    tier: str
+
+class Guardrail:
+    """
+    Tiered moderation. A message is checked against a verdict cache, a regex blocklist
+    of jailbreak strings and an embedding-similarity classifier over known unsafe
+    examples; messages the local tiers cannot decide, or that match a suspicious
+    pattern, are sent to the LLM guardrail.
+    """
+    def __init__(self, llm, embedder, prompt: str, examples_path: str = Config.GUARDRAIL_EXAMPLES_PATH):
+        self.llm = llm
+        self.embedder = embedder
+        self.prompt = prompt
+        self.examples_path = examples_path
+        self._unsafe_embeddings = None
+        self._examples_lock = threading.Lock()
+        self._verdicts = OrderedDict()
+        self._verdicts_lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(message: str) -> str:
+        normalized = re.sub(r"\s+", " ", message.lower()).strip()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[bool]:
+        with self._verdicts_lock:
+            safe = self._verdicts.get(key)
+            if safe is not None:
+                self._verdicts.move_to_end(key)
+            return safe
+
+    def _remember(self, key: str, safe: bool):
+        with self._verdicts_lock:
+            self._verdicts[key] = safe
+            while len(self._verdicts) > Config.GUARDRAIL_CACHE_SIZE:
+                self._verdicts.popitem(last=False)
+
+    def unsafe_embeddings(self) -> np.ndarray:
+        """
+        Normalized embeddings of the unsafe examples, computed on first use.
+        """
+        if self._unsafe_embeddings is None:
+            with self._examples_lock:
+                if self._unsafe_embeddings is None:
+                    with open(self.examples_path, "r") as f:
+                        examples = [line.strip() for line in f if line.strip()]
+                    embeddings = np.asarray(self.embedder.generate_embeddings(examples), dtype=np.float32)
+                    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+                    self._unsafe_embeddings = embeddings
+        return self._unsafe_embeddings
+
+    def unsafe_similarity(self, message: str) -> float:
+        query_vector = np.asarray(self.embedder.generate_embedding(message), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        return float(np.max(self.unsafe_embeddings() @ query_vector))
+
+    def classify_locally(self, message: str) -> Optional[Verdict]:
+        """
+        Decide with the cheap local tiers, or return None when the message is
+        ambiguous and needs the LLM guardrail. Only the cache and the embedding tier
+        (below GUARDRAIL_SAFE_THRESHOLD, disabled until calibrated) can clear a message.
+        """
+        safe = self._cached(self.cache_key(message))
+        if safe is not None:
+            return Verdict(safe, "cache")
+        if any(pattern.search(message) for pattern in BLOCKLIST_PATTERNS):
+            return Verdict(False, "blocklist")
+        if not Config.GUARDRAIL_EMBEDDING_ENABLED:
+            return None
+        similarity = self.unsafe_similarity(message)
+        if similarity >= Config.GUARDRAIL_UNSAFE_THRESHOLD:
+            return Verdict(False, "embedding")
+        if any(pattern.search(message) for pattern in SUSPICIOUS_PATTERNS):
+            return None
+        if similarity < Config.GUARDRAIL_SAFE_THRESHOLD:
+            return Verdict(True, "embedding")
+        return None
+
+    async def acheck(self, message: str) -> Verdict:
+        verdict = await asyncio.to_thread(self.classify_locally, message)
+        if verdict is None:
+            verdict = await self._llm_check(message)
+        if verdict.tier not in ("cache", "error"):
+            self._remember(self.cache_key(message), verdict.safe)
+        metrics.inc("guardrail_decisions_total", tier=verdict.tier, verdict="safe" if verdict.safe else "unsafe")
+        return verdict
+
+    async def _llm_check(self, message: str) -> Verdict:
+        try:
+            prompt = self.prompt.format(user_input=message)
+            with metrics.span("guardrail"):
+                response = await self.llm.acomplete(messages=prompt)
+            moderation_result = json.loads(response)
+            logger.debug("Moderation response: %s", moderation_result)
+            return Verdict(moderation_result.get("status") == "SAFE", "llm")
+        except Exception as e:
+            logger.error("Moderation LLM call failed: %s", e)
+            return Verdict(Config.GUARDRAIL_FAIL_OPEN, "error")
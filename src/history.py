@@ -0,0 +1,128 @@
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Tuple
+from src.config import Config
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token), good enough for budgeting.
+    """
+    return len(text) // 4 + 1
+
+class CompactHistory(NamedTuple):
+    summary: str
+    turns: List[Tuple[str, str]]
+
+    @classmethod
+    def wrap(cls, history) -> "CompactHistory":
+        """
+        Accept either a compacted history or a plain list of (user, bot) turns.
+        """
+        if isinstance(history, cls):
+            return history
+        return cls("", [tuple(turn) for turn in history])
+
+    def format(self) -> str:
+        lines = [f"Summary of earlier conversation: {self.summary}"] if self.summary else []
+        for user_turn, bot_turn in self.turns:
+            lines.append(f"User: {user_turn}")
+            lines.append(f"Assistant: {bot_turn}")
+        return "\n".join(lines)
+
+class HistoryManager:
+    """
+    Bounds the conversation history sent to the LLM. The most recent turns are kept
+    verbatim and older turns are folded into a rolling summary. Summaries are memoized
+    by a hash chain over the folded turns, so each turn is summarized once: a longer
+    prefix is built by folding only the new turns into the longest summary already known.
+    """
+    def __init__(
+        self,
+        llm,
+        prompt: str,
+        keep_turns: int = Config.HISTORY_KEEP_TURNS,
+        fold_stride: int = Config.HISTORY_FOLD_STRIDE,
+        token_budget: int = Config.HISTORY_TOKEN_BUDGET,
+    ):
+        self.llm = llm
+        self.prompt = prompt
+        self.keep_turns = keep_turns
+        self.fold_stride = max(fold_stride, 1)
+        self.token_budget = token_budget
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prefix_hashes(turns) -> List[str]:
+        """
+        hashes[i] identifies turns[:i], so every prefix of a conversation has a stable key.
+        """
+        hashes = [hashlib.sha256(b"").hexdigest()]
+        for user_turn, bot_turn in turns:
+            turn = json.dumps([user_turn, bot_turn])
+            hashes.append(hashlib.sha256((hashes[-1] + turn).encode("utf-8")).hexdigest())
+        return hashes
+
+    def _fold_boundary(self, history) -> int:
+        """
+        Number of leading turns to fold into the summary. At least `keep_turns` turns
+        stay verbatim and folding happens in strides, so most turns reuse the previous
+        summary without an LLM call.
+        """
+        overflow = len(history) - self.keep_turns
+        boundary = overflow // self.fold_stride * self.fold_stride if overflow > 0 else 0
+        # the newest turn is always kept verbatim, whatever its size
+        while boundary < len(history) - 1 and self._tokens(history[boundary:]) > self.token_budget:
+            boundary += 1
+        return min(boundary, max(len(history) - 1, 0))
+
+    @staticmethod
+    def _tokens(turns) -> int:
+        return sum(estimate_tokens(user_turn) + estimate_tokens(bot_turn) for user_turn, bot_turn in turns)
+
+    async def acompact(self, history) -> CompactHistory:
+        history = CompactHistory.wrap(history).turns
+        boundary = self._fold_boundary(history)
+        if boundary == 0:
+            return CompactHistory("", history)
+        summary = await self._asummary(history[:boundary])
+        return CompactHistory(summary, history[boundary:])
+
+    async def _asummary(self, turns) -> str:
+        hashes = self.prefix_hashes(turns)
+        with self._lock:
+            known = next(i for i in range(len(turns), -1, -1) if i == 0 or hashes[i] in self._summaries)
+            summary = self._summaries.get(hashes[known], "")
+            if known == len(turns):
+                self._summaries.move_to_end(hashes[known])
+                metrics.inc("history_summaries_total", outcome="memoized")
+                return summary
+
+        new_turns = CompactHistory("", turns[known:]).format()
+        prompt = self.prompt.format(
+            summary=summary or "(empty)",
+            new_turns=new_turns,
+            max_words=Config.HISTORY_SUMMARY_MAX_WORDS,
+        )
+        try:
+            with metrics.span("history_summary"):
+                response = await self.llm.acomplete(messages=prompt)
+            summary = json.loads(response).get("summary", "") or summary
+            metrics.inc("history_summaries_total", outcome="folded")
+        except Exception as e:
+            # keep the last good summary; the unfolded turns are dropped from the prompt
+            logger.error("History summarization failed: %s", e)
+            metrics.inc("history_summaries_total", outcome="error")
+            return summary
+
+        with self._lock:
+            self._summaries[hashes[-1]] = summary
+            while len(self._summaries) > Config.HISTORY_SUMMARY_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+        return summary
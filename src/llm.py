@@ -1,21 +1,71 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import random
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 from google import genai
 from google.genai import types
 from src.config import Config
+from src.ratelimit import RateLimiter
+from src.metrics import metrics
+from src import runner
 
 logger = logging.getLogger(__name__)
 config = Config()
 
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 class GeminiLLM:
-    def __init__(self):
+    _shared_client = None
+
+    def __init__(self, client=None, rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize the Gemini client with API key.
+        A custom client (e.g. a local fake) and rate limiter can be passed in for testing.
         """
-        self._client = genai.Client(api_key=config.GEMINI_API_KEY)
+        self._client = client or self._get_shared_client()
         self.model = config.LLM_MODEL_NAME
-        
-    def complete(
+        self.max_retries = config.LLM_MAX_RETRIES
+        self._semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
+        self._rate_limiter = rate_limiter or RateLimiter(
+            requests_per_minute=config.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+        )
+
+    @classmethod
+    def _get_shared_client(cls):
+        """
+        Reuse a single client (and its connection pool) across all instances.
+        """
+        if cls._shared_client is None:
+            cls._shared_client = genai.Client(api_key=config.GEMINI_API_KEY)
+        return cls._shared_client
+
+    @staticmethod
+    def _estimate_tokens(messages) -> int:
+        """
+        Rough prompt size estimate (~4 characters per token) used for TPM limiting.
+        """
+        return max(1, len(str(messages)) // 4)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def _extract_text(response) -> Optional[str]:
+        if response.candidates:
+            if response.candidates[0].content and response.candidates[0].content.parts:
+                return response.candidates[0].content.parts[0].text
+        return None
+
+    @staticmethod
+    def _record_usage(response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            metrics.inc("llm_prompt_tokens_total", usage.prompt_token_count or 0)
+            metrics.inc("llm_completion_tokens_total", usage.candidates_token_count or 0)
+
+    async def acomplete(
         self,
         messages: List[Dict],
         temperature: float = 0,
@@ -23,22 +73,125 @@ class GeminiLLM:
         response_mime_type: str = "application/json",
     ) -> Optional[str]:
         """
-        Send a request to Gemini for chat completion.
+        Send an async request to Gemini for chat completion.
+        Requests are rate limited, bounded in flight and retried with jittered
+        exponential backoff on 429/5xx errors.
         """
-        
-        config = types.GenerateContentConfig(
+        config_ = types.GenerateContentConfig(
             temperature=temperature,
             max_output_tokens=max_tokens,
             response_mime_type=response_mime_type,
         )
-           
-        response = self._client.models.generate_content(
-            model=self.model,
-            contents=messages,
-            config=config,
+        estimated_tokens = self._estimate_tokens(messages)
+
+        for attempt in range(self.max_retries + 1):
+            await self._rate_limiter.acquire(estimated_tokens)
+            async with self._semaphore:
+                try:
+                    response = await self._client.aio.models.generate_content(
+                        model=self.model,
+                        contents=messages,
+                        config=config_,
+                    )
+                    metrics.inc("llm_requests_total", status="ok")
+                    self._record_usage(response)
+                    return self._extract_text(response)
+                except Exception as e:
+                    metrics.inc("llm_requests_total", status="error")
+                    if not self._is_retryable(e) or attempt == self.max_retries:
+                        raise
+                    error = e
+
+            metrics.inc("llm_retries_total")
+            delay = random.uniform(0, min(config.LLM_RETRY_MAX_DELAY, config.LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+            logger.warning("Gemini call failed (%s), retry %d/%d in %.1fs", error, attempt + 1, self.max_retries, delay)
+            await asyncio.sleep(delay)
+
+    async def astream(
+        self,
+        messages: List[Dict],
+        temperature: float = 0,
+        max_tokens: int = 2048,
+        response_mime_type: str = "application/json",
+    ) -> AsyncIterator[str]:
+        """
+        Stream a Gemini chat completion as text chunks. Failures are retried like
+        acomplete as long as nothing has been yielded yet.
+        """
+        config_ = types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            response_mime_type=response_mime_type,
         )
-        
-        if response.candidates:
-            if response.candidates[0].content and response.candidates[0].content.parts:
-                return response.candidates[0].content.parts[0].text
-        return None
\ No newline at end of file
+        estimated_tokens = self._estimate_tokens(messages)
+
+        for attempt in range(self.max_retries + 1):
+            await self._rate_limiter.acquire(estimated_tokens)
+            started = False
+            async with self._semaphore:
+                try:
+                    stream = await self._client.aio.models.generate_content_stream(
+                        model=self.model,
+                        contents=messages,
+                        config=config_,
+                    )
+                    last_chunk = None
+                    async for chunk in stream:
+                        last_chunk = chunk
+                        if chunk.text:
+                            started = True
+                            yield chunk.text
+                    metrics.inc("llm_requests_total", status="ok")
+                    self._record_usage(last_chunk)
+                    return
+                except Exception as e:
+                    metrics.inc("llm_requests_total", status="error")
+                    if started or not self._is_retryable(e) or attempt == self.max_retries:
+                        raise
+                    error = e
+
+            metrics.inc("llm_retries_total")
+            delay = random.uniform(0, min(config.LLM_RETRY_MAX_DELAY, config.LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+            logger.warning("Gemini stream failed (%s), retry %d/%d in %.1fs", error, attempt + 1, self.max_retries, delay)
+            await asyncio.sleep(delay)
+
+    async def acomplete_batch(self, messages_list: List[List[Dict]], **kwargs) -> List[Optional[str]]:
+        """
+        Run several completions concurrently, returning results in input order. A
+        completion that fails after its retries yields None instead of failing the batch.
+        """
+        results = await asyncio.gather(
+            *(self.acomplete(messages, **kwargs) for messages in messages_list),
+            return_exceptions=True,
+        )
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error("Batch completion %d/%d failed: %s", index + 1, len(results), result)
+                results[index] = None
+        return results
+
+    def complete(
+        self,
+        messages: List[Dict],
+        temperature: float = 0,
+        max_tokens: int = 2048,
+        response_mime_type: str = "application/json",
+    ) -> Optional[str]:
+        """
+        Send a request to Gemini for chat completion.
+        """
+        return runner.run(self.acomplete(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_mime_type=response_mime_type,
+        ))
+
+    def stream(self, messages: List[Dict], **kwargs) -> Iterator[str]:
+        """
+        Synchronous wrapper around astream.
+        """
+        return runner.iterate(self.astream(messages, **kwargs))
+
+    def complete_batch(self, messages_list: List[List[Dict]], **kwargs) -> List[Optional[str]]:
+        return runner.run(self.acomplete_batch(messages_list, **kwargs))
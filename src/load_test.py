@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.config import Config
+from src.ratelimit import RateLimiter
+from src.fakes import FakeGeminiClient
+from src.llm import GeminiLLM
+from src import gradio as app
+from src.services import services
+from src.retriever import RAG
+
+async def simulate_user(user: int, questions: List[str], turns: int, think_time: float, results: List[Dict]):
+    history = []
+    course = list(Config.COURSE_TO_FILE_MAP)[user % len(Config.COURSE_TO_FILE_MAP)]
+    for turn in range(turns):
+        question = random.choice(questions)
+        start = time.perf_counter()
+        first_token = None
+        shed = False
+        async for _, turns_so_far, state in app.chat_interface(question, history, course):
+            answer = turns_so_far[-1][1]
+            if answer == app.BUSY_MESSAGE:
+                shed = True
+            elif answer and first_token is None:
+                first_token = time.perf_counter() - start
+            history = state
+        results.append({
+            "user": user,
+            "turn": turn,
+            "latency": time.perf_counter() - start,
+            "ttft": first_token,
+            "shed": shed,
+        })
+        await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    served = [r for r in results if not r["shed"]]
+    summary = {
+        "requests": len(results),
+        "served": len(served),
+        "shed": len(results) - len(served),
+        "throughput_rps": len(served) / elapsed if elapsed else 0.0,
+    }
+    for key in ("latency", "ttft"):
+        values = [r[key] * 1000 for r in served if r[key] is not None]
+        if values:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[key] = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+    return summary
+
+async def run_load_test(args) -> Dict:
+    rate_limiter = None if args.keep_rate_limits else RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    services.override("llm", GeminiLLM(client=FakeGeminiClient(args.llm_latency), rate_limiter=rate_limiter))
+    # questions come from the benchmark, which FAQ_DIR may include; measure the pipeline instead
+    services.override("rag", RAG(faq_enabled=args.faq, cache_enabled=args.cache))
+
+    with open(args.benchmark, "r") as f:
+        questions = [test_case["user_input"] for test_case in json.load(f)]
+
+    results = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_user(user, questions, args.turns, args.think_time, results)
+        for user in range(args.users)
+    ))
+    return summarize(results, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent chat users against a stubbed LLM.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3, help="questions asked by each user")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a user's questions")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per stubbed LLM call")
+    parser.add_argument("--benchmark", default="evaluation/evaluation_benchmark.json", help="source of questions")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--faq", action="store_true", help="keep FAQ answers enabled")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="apply the configured Gemini RPM/TPM limits")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args))
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
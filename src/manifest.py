@@ -0,0 +1,70 @@
+import os
+import json
+import uuid
+import hashlib
+from src.config import Config
+
+POINT_NAMESPACE = uuid.UUID("6f1c5e0a-3b7e-4c59-9a55-1e0b7f6f2a41")
+
+def file_hash(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def point_id(*parts) -> str:
+    """
+    Deterministic point ID, so re-ingesting identical content upserts instead of duplicating.
+    """
+    return str(uuid.uuid5(POINT_NAMESPACE, ":".join(str(p) for p in parts)))
+
+
+class Manifest:
+    """
+    Local record of what is indexed: for every PDF, its file hash and, per page,
+    the page content hash and the IDs of the chunk points stored for it, plus the
+    chunking settings the points were built with.
+
+    {"settings": {...}, "files": {filename: {"file_hash": str, "pages": {page: {"hash": str, "ids": [str]}}}}}
+    """
+    def __init__(self, path: str = Config.MANIFEST_PATH):
+        self.path = path
+        self.files = {}
+        self.settings = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = data.get("files", {})
+            self.settings = data.get("settings")
+
+    def pages(self, filename: str) -> dict:
+        return self.files.get(filename, {}).get("pages", {})
+
+    def point_ids(self, filename: str) -> list:
+        return [point for page in self.pages(filename).values() for point in page["ids"]]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def parent_ids(self) -> set:
+        """
+        IDs of the pages currently indexed, as referenced by their chunks' `parent_id`.
+        """
+        return {
+            point_id(name, int(page), entry["hash"])
+            for name, file_entry in self.files.items()
+            for page, entry in file_entry.get("pages", {}).items()
+        }
+
+    def clear(self):
+        self.files = {}
+        self.settings = None
+        self.save()
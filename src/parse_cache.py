@@ -0,0 +1,46 @@
+import os
+import json
+import hashlib
+from typing import List, Optional
+from src.config import Config
+from src.manifest import file_hash
+
+# Anything that changes what LlamaParse returns must be part of the cache key
+PARSER_SETTINGS = {"parser": "llama_parse", "result_type": "markdown", "split_by_page": True}
+
+def cache_key(filepath, settings: dict = PARSER_SETTINGS) -> str:
+    """
+    Content address of a parse result: the PDF hash combined with the parser settings.
+    """
+    digest = hashlib.sha256(file_hash(filepath).encode("utf-8"))
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed page nodes, one JSONL file per cache key
+    holding a {"text", "metadata"} record per page.
+    """
+    def __init__(self, directory: str = Config.PARSE_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jsonl")
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def put(self, key: str, nodes: List[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for node in nodes:
+                record = {"text": node["text"], "metadata": node.get("metadata", {})}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
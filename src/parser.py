@@ -3,12 +3,15 @@ import logging
 import json
 import asyncio
 from pathlib import Path
-from llama_index.core import Document
-from llama_cloud_services import LlamaParse
-from src.embedder import Embedder
+from concurrent.futures import ThreadPoolExecutor
+from src.config import Config
+from src.services import services
+from src.manifest import point_id, text_hash
+from src.parse_cache import ParseCache, cache_key
+from src.chunker import MarkdownChunker, chunk_page
 
 logger = logging.getLogger(__name__)
-embedder = Embedder()
+parse_cache = ParseCache()
 
 def save_documents_to_json(documents, output_path):
     json_data = []
@@ -22,34 +25,100 @@ def save_documents_to_json(documents, output_path):
         json.dump(json_data, f, ensure_ascii=False, indent=2)
        
 async def llama_parse(filepath):
+    """
+    Parse a PDF into per-page markdown nodes, reading from the local parse cache when possible.
+    """
+    key = cache_key(filepath) if Config.PARSE_CACHE_ENABLED else None
+    if key:
+        cached_nodes = parse_cache.get(key)
+        if cached_nodes is not None:
+            logger.info(f"Loaded {filepath} from parse cache")
+            return cached_nodes
+        if Config.PARSE_CACHE_ONLY:
+            raise FileNotFoundError(f"No cached parse for {filepath} and PARSE_CACHE_ONLY is set")
+
+    from llama_cloud_services import LlamaParse
     result = await LlamaParse().aparse(str(filepath))
     markdown_nodes = await result.aget_markdown_nodes(split_by_page=True)
     nodes_data = [node.to_dict() if hasattr(node, "to_dict") else dict(node) for node in markdown_nodes]
+    if key:
+        parse_cache.put(key, nodes_data)
     return nodes_data
      
 async def process_file(filepath):
+    from llama_index.core import Document
     nodes_data = await llama_parse(filepath)
     filename = os.path.basename(filepath)
-    text_documents = [
-        Document(text=node["text"], metadata={**node.get("metadata", {}), "filename": filename})
-        for node in nodes_data
-    ]
-    for doc in text_documents:
-        doc.embedding = embedder.generate_embedding(doc.text)
+    text_documents = []
+    for page, node in enumerate(nodes_data, start=1):
+        page_hash = text_hash(node["text"])
+        text_documents.append(Document(
+            id_=point_id(filename, page, page_hash),
+            text=node["text"],
+            metadata={**node.get("metadata", {}), "filename": filename, "page": page, "page_hash": page_hash},
+        ))
     return text_documents
 
-async def parse_pdf(file_path):
+def embed_documents(documents, pool=None):
+    """
+    Embed a batch of documents in place with a single encode call.
+    """
+    embeddings = services.embedder.generate_embeddings([doc.text for doc in documents], pool=pool)
+    for doc, embedding in zip(documents, embeddings):
+        doc.embedding = embedding
+    return documents
+
+async def parse_pdf(file_path, filepaths=None, select=None, parents=None):
     """
-    Parses all PDF files in a directory concurrently and returns their content as documents.
+    Parses all PDF files in a directory concurrently and returns their content as chunk documents.
+    Parsed pages from every file are split into chunks (see CHUNK_STRATEGY) and streamed
+    into batches that are embedded off the event loop, so parsing of one file overlaps
+    with embedding of another.
+    `filepaths` restricts parsing to the given files, and pages for which `select(doc)`
+    returns False are dropped before chunking. If a `parents` dict is given, it is
+    filled with the selected pages, keyed by the parent ID their chunks point to.
     """
     documents = []
     logger.info(f"Parsing text from {file_path}")
 
-    filepaths = [p for p in Path(file_path).iterdir() if p.suffix.lower() == ".pdf"]
-    tasks = [process_file(filepath) for filepath in filepaths]
-    results = await asyncio.gather(*tasks)
-    for docs in results:
-        documents.extend(docs)
+    if filepaths is None:
+        filepaths = [p for p in Path(file_path).iterdir() if p.suffix.lower() == ".pdf"]
+    queue = asyncio.Queue()
+    chunker = MarkdownChunker()
+
+    async def produce(filepath):
+        for page in await process_file(filepath):
+            if select is not None and not select(page):
+                continue
+            if parents is not None:
+                parents[page.id_] = {"text": page.text, "filename": page.metadata["filename"], "page": page.metadata["page"]}
+            for doc in chunk_page(page, chunker):
+                await queue.put(doc)
+
+    async def produce_all():
+        try:
+            await asyncio.gather(*(produce(filepath) for filepath in filepaths))
+        finally:
+            await queue.put(None)
+
+    loop = asyncio.get_running_loop()
+    flush_size = Config.EMBED_BATCH_SIZE * max(1, Config.EMBED_PROCESSES)
+    # a single embedding worker: the model already parallelises each batch internally
+    with ThreadPoolExecutor(max_workers=1) as executor, services.embedder.multi_process_pool() as pool:
+        producer = asyncio.create_task(produce_all())
+        embed_tasks = []
+        batch = []
+        while (doc := await queue.get()) is not None:
+            batch.append(doc)
+            if len(batch) >= flush_size:
+                embed_tasks.append(loop.run_in_executor(executor, embed_documents, batch, pool))
+                batch = []
+        if batch:
+            embed_tasks.append(loop.run_in_executor(executor, embed_documents, batch, pool))
+
+        await producer
+        for docs in await asyncio.gather(*embed_tasks):
+            documents.extend(docs)
 
     save_documents_to_json(documents, "parsed_documents.json")
-    return documents
\ No newline at end of file
+    return documents
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `rate_per_minute`.
+    A rate of 0 or less disables limiting.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        """
+        Wait until `amount` tokens are available and take them.
+        Requests larger than the bucket capacity are clamped so they can still proceed.
+        """
+        if self.rate <= 0:
+            return
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Combined requests-per-minute and tokens-per-minute limiter.
+    """
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, tokens: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit: grows by one slot after each success and halves on
+    failure (e.g. a rate-limit error), between 1 and `max_limit` slots.
+    """
+    def __init__(self, max_limit: int, initial_limit: int = None):
+        self.max_limit = max_limit
+        self.limit = initial_limit or max_limit
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def record_success(self):
+        async with self._condition:
+            self.limit = min(self.max_limit, self.limit + 1)
+            self._condition.notify_all()
+
+    async def record_failure(self):
+        async with self._condition:
+            self.limit = max(1, self.limit // 2)
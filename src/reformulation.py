@@ -0,0 +1,71 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from src.config import Config
+
+# Words that usually point back to something said earlier in the conversation
+REFERENCE_PATTERN = re.compile(
+    r"\b(it|its|they|them|their|theirs|he|him|his|she|her|hers|this|that|these|those|"
+    r"former|latter|same|above|previous|aforementioned|else|too|again)\b",
+    re.IGNORECASE,
+)
+# Openers that continue the previous turn, e.g. "and for year 2?" or "what about pharmacy?"
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(and|or|but|so|also|then|what about|how about|why|how come)\b",
+    re.IGNORECASE,
+)
+
+class ReformulationPolicy:
+    """
+    Decides whether a query needs an LLM rewrite before retrieval, and memoizes
+    rewrites by (recent history, query).
+    """
+    def __init__(
+        self,
+        mode: str = Config.REFORMULATE_POLICY,
+        memo_size: int = Config.REFORMULATE_MEMO_SIZE,
+        history_turns: int = Config.REFORMULATE_MEMO_HISTORY_TURNS,
+    ):
+        self.mode = mode
+        self.memo_size = memo_size
+        self.history_turns = history_turns
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decide(self, history, query: str) -> Tuple[bool, str]:
+        """
+        Return (needs_rewrite, reason).
+        """
+        if not history:
+            return False, "no_history"
+        if self.mode == "always":
+            return True, "always"
+        words = query.split()
+        if (
+            REFERENCE_PATTERN.search(query)
+            or FOLLOW_UP_PATTERN.search(query)
+            or len(words) <= Config.REFORMULATE_SHORT_QUERY_WORDS
+            or query.rstrip().endswith(("...", "…"))
+        ):
+            return True, "context_dependent"
+        return False, "self_contained"
+
+    def _key(self, history, query: str):
+        recent = tuple(tuple(turn) for turn in history[-self.history_turns:]) if self.history_turns else ()
+        return recent, " ".join(query.lower().split())
+
+    def get(self, history, query: str) -> Optional[str]:
+        key = self._key(history, query)
+        with self._lock:
+            rewrite = self._memo.get(key)
+            if rewrite is not None:
+                self._memo.move_to_end(key)
+            return rewrite
+
+    def put(self, history, query: str, rewrite: str):
+        key = self._key(history, query)
+        with self._lock:
+            self._memo[key] = rewrite
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
@@ -0,0 +1,128 @@
+import logging
+from dataclasses import dataclass
+from typing import List
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RankedChunk:
+    id: str
+    text: str
+    metadata: dict
+    score: float
+
+
+class Reranker:
+    """
+    Reorders retrieved chunks (objects with id, score and payload) by relevance to the query
+    and returns the best `top_n` as RankedChunk objects, highest score first.
+    """
+    def __init__(self, top_n: int = Config.RERANK_TOP_P):
+        self.top_n = top_n
+
+    def rerank(self, chunks, query: str) -> List[RankedChunk]:
+        raise NotImplementedError
+
+    def rerank_batch(self, chunk_lists: list, queries: List[str]) -> List[List[RankedChunk]]:
+        """
+        Rerank several (chunks, query) pairs, returning one ranked list per query.
+        """
+        return [self.rerank(chunks, query) for chunks, query in zip(chunk_lists, queries)]
+
+
+class CohereReranker(Reranker):
+    def __init__(self, top_n: int = Config.RERANK_TOP_P):
+        super().__init__(top_n)
+        from llama_index.postprocessor.cohere_rerank import CohereRerank
+        self.reranker = CohereRerank(top_n=top_n)
+
+    def rerank(self, chunks, query: str) -> List[RankedChunk]:
+        from llama_index.core.schema import NodeWithScore, TextNode
+        nodes = [
+            NodeWithScore(
+                node=TextNode(
+                    text=chunk.payload["text"],
+                    metadata=chunk.payload["metadata"],
+                    id_=str(chunk.id)
+                ),
+                score=chunk.score
+            )
+            for chunk in chunks
+        ]
+        reranked_nodes = self.reranker.postprocess_nodes(nodes=nodes, query_str=query)
+        return [
+            RankedChunk(id=node.node.id_, text=node.node.text, metadata=node.node.metadata, score=node.score)
+            for node in reranked_nodes
+        ]
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Local CPU reranker scoring every (query, chunk) pair in batched forward passes.
+    """
+    def __init__(self, top_n: int = Config.RERANK_TOP_P, model_name: str = Config.CROSS_ENCODER_MODEL):
+        super().__init__(top_n)
+        import torch
+        from sentence_transformers import CrossEncoder
+        # ms-marco cross-encoders default to an identity activation (raw logits); apply a
+        # sigmoid so scores fall in [0, 1] like Cohere's and share RERANK_THRESHOLD
+        self.model = CrossEncoder(model_name, device="cpu", activation_fn=torch.nn.Sigmoid())
+
+    def rerank(self, chunks, query: str) -> List[RankedChunk]:
+        return self.rerank_batch([chunks], [query])[0]
+
+    def rerank_batch(self, chunk_lists: list, queries: List[str]) -> List[List[RankedChunk]]:
+        pairs = [(query, chunk.payload["text"]) for chunks, query in zip(chunk_lists, queries) for chunk in chunks]
+        if not pairs:
+            return [[] for _ in chunk_lists]
+        scores = self.model.predict(pairs, batch_size=Config.CROSS_ENCODER_BATCH_SIZE, show_progress_bar=False)
+
+        results, offset = [], 0
+        for chunks in chunk_lists:
+            chunk_scores = scores[offset:offset + len(chunks)]
+            offset += len(chunks)
+            ranked = sorted(zip(chunks, chunk_scores), key=lambda pair: pair[1], reverse=True)[:self.top_n]
+            results.append([
+                RankedChunk(id=str(chunk.id), text=chunk.payload["text"], metadata=chunk.payload["metadata"], score=float(score))
+                for chunk, score in ranked
+            ])
+        return results
+
+
+class FallbackReranker(Reranker):
+    """
+    Use the primary reranker, switching to the fallback for a call if the primary raises.
+    """
+    def __init__(self, primary: Reranker, fallback: Reranker):
+        super().__init__(primary.top_n)
+        self.primary = primary
+        self.fallback = fallback
+
+    def rerank(self, chunks, query: str) -> List[RankedChunk]:
+        try:
+            return self.primary.rerank(chunks, query)
+        except Exception as e:
+            logger.warning("Reranker %s failed (%s), falling back to %s", type(self.primary).__name__, e, type(self.fallback).__name__)
+            return self.fallback.rerank(chunks, query)
+
+    def rerank_batch(self, chunk_lists: list, queries: List[str]) -> List[List[RankedChunk]]:
+        try:
+            return self.primary.rerank_batch(chunk_lists, queries)
+        except Exception as e:
+            logger.warning("Reranker %s failed (%s), falling back to %s", type(self.primary).__name__, e, type(self.fallback).__name__)
+            return self.fallback.rerank_batch(chunk_lists, queries)
+
+
+RERANKERS = {
+    "cohere": CohereReranker,
+    "cross-encoder": CrossEncoderReranker,
+}
+
+def create_reranker(name: str = Config.RERANKER, fallback: str = Config.RERANKER_FALLBACK) -> Reranker:
+    if name not in RERANKERS or (fallback and fallback not in RERANKERS):
+        raise ValueError(f"Unknown reranker: {name if name not in RERANKERS else fallback}")
+    reranker = RERANKERS[name]()
+    if fallback and fallback != name:
+        return FallbackReranker(reranker, RERANKERS[fallback]())
+    return reranker
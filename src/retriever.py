@@ -1,137 +1,375 @@
 import json
+import time
+import asyncio
 import logging
-from llama_index.postprocessor.cohere_rerank import CohereRerank
-from llama_index.core.schema import NodeWithScore, TextNode
-from src.llm import GeminiLLM
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple
 from src.config import Config
-from src.vector import VectorDB
+from src.cache import CacheEntry, response_cache
+from src.streaming import JsonFieldStreamer
+from src.metrics import metrics
+from src.reformulation import ReformulationPolicy
+from src.guardrail import Guardrail
+from src.history import CompactHistory, HistoryManager
+from src.context import ContextPacker
+from src.services import services
+from src import runner
 
 logger = logging.getLogger(__name__)
-llm = GeminiLLM()
-vectordb = VectorDB()
+
+FLAGGED_MESSAGE = "⚠️ Your message was flagged for violating content guidelines."
+
+class Retrieval(NamedTuple):
+    query: str
+    query_vector: List[float]
+    contexts: List[str]
+    cached: Optional[CacheEntry] = None
+
+class PreparedTurn(NamedTuple):
+    answer: Optional[str]
+    contexts: List[str]
+    messages: Optional[list] = None
+    retrieval: Optional[Retrieval] = None
+    start: float = 0.0
 
 class RAG():
-    def __init__(self):
-        self.reranker = CohereRerank(top_n=Config.RERANK_TOP_P)
+    def __init__(self, faq_enabled: Optional[bool] = None, cache_enabled: Optional[bool] = None):
+        """
+        `faq_enabled` and `cache_enabled` override FAQ_ENABLED and RESPONSE_CACHE_ENABLED
+        for this instance, e.g. to evaluate the full pipeline on every question.
+        """
+        self.faq_enabled = Config.FAQ_ENABLED if faq_enabled is None else faq_enabled
+        self.cache_enabled = Config.RESPONSE_CACHE_ENABLED if cache_enabled is None else cache_enabled
+        self.reformulation_policy = ReformulationPolicy()
+        self.context_packer = ContextPacker()
         with open(Config.REFORMULATE_PROMPT_PATH, "r") as file:
             self.reformulate_prompt = file.read()
         with open(Config.QA_PROMPT_PATH, "r") as file:
             self.qa_prompt = file.read()
         with open(Config.GUARDRAIL_PATH, "r") as file:
             self.guardrail_prompt = file.read()
+        self.guardrail = Guardrail(services.llm, services.embedder, self.guardrail_prompt)
+        with open(Config.SUMMARIZE_PROMPT_PATH, "r") as file:
+            self.history_manager = HistoryManager(services.llm, file.read())
             
+    @property
+    def reranker(self):
+        return services.reranker
+
     # guardrail check to ensure user input is safe
+    async def ais_safe_message(self, user_input: str) -> bool:
+        """
+        Tiered moderation: local checks first, the LLM guardrail only for ambiguous messages.
+        """
+        verdict = await self.guardrail.acheck(user_input)
+        logger.debug("Moderation verdict: %s", verdict)
+        return verdict.safe
+
     def is_safe_message(self, user_input: str) -> bool:
-        # return True  # Placeholder for actual guardrail check logic
-        try:
-            prompt = self.guardrail_prompt.format(user_input=user_input)
-            response = llm.complete(messages=prompt)
-            moderation_result = json.loads(response)
-            logger.info("Moderation response: %s and status: %s", moderation_result, moderation_result.get("status") == "SAFE")
-            return moderation_result.get("status") == "SAFE"
-    
-        except Exception as e:
-            logger.error("Moderation LLM call failed: %s", e)
-            # Fail-safe: assume it's safe if moderation check fails
-            return True
+        return runner.run(self.ais_safe_message(user_input))
 
-    def reformulate_query(self, history, query) -> str:
+    async def areformulate_query(self, history, query) -> str:
         """
-        Reformulate query based on past message history 
+        Reformulate query based on past message history. The LLM is skipped for
+        first-turn and self-contained queries, and rewrites are memoized.
         """
+        history = CompactHistory.wrap(history)
+        needs_rewrite, reason = self.reformulation_policy.decide(history.turns, query)
+        if not needs_rewrite:
+            metrics.inc("reformulation_decisions_total", decision=reason)
+            return query
+
+        memoized = self.reformulation_policy.get(history.turns, query)
+        if memoized is not None:
+            metrics.inc("reformulation_decisions_total", decision="memoized")
+            return memoized
+
         prompt = self.reformulate_prompt.format(
-            chat_history=history,
+            chat_history=history.format(),
             latest_message=query
         )
     
-        reformulated_query = llm.complete(messages=prompt)
+        with metrics.span("reformulation"):
+            reformulated_query = await services.llm.acomplete(messages=prompt)
         reformulated_query_dict = json.loads(reformulated_query)
-        logger.info("Reformulated query: %s", reformulated_query)
-        return reformulated_query_dict.get("reformulated_message", "")
+        logger.debug("Reformulated query: %s", reformulated_query)
+        metrics.inc("reformulation_decisions_total", decision="rewritten")
+        rewrite = reformulated_query_dict.get("reformulated_message", "") or query
+        self.reformulation_policy.put(history.turns, query, rewrite)
+        return rewrite
+
+    def reformulate_query(self, history, query) -> str:
+        return runner.run(self.areformulate_query(history, query))
 
     def rerank_chunks(self, chunks, query: str) -> list:
         """
-        Rerank the retrieved chunks using Cohere reranker
+        Rerank the retrieved chunks and drop those scoring below the threshold
         """
-        nodes = [
-            NodeWithScore(
-                node=TextNode(
-                    text=chunk.payload["text"],
-                    metadata=chunk.payload["metadata"],
-                    id_=chunk.id
-                ),
-                score=chunk.score
-            )
-            for chunk in chunks
-        ]
-        reranked_chunks = self.reranker.postprocess_nodes(nodes=nodes, query_str=query)
-        logger.info("Reranked chunks: %s", reranked_chunks)
-        filtered_chunks = [node for node in reranked_chunks if node.score >= 0.1]
+        with metrics.span("rerank"):
+            reranked_chunks = self.reranker.rerank(chunks, query)
+        logger.debug("Reranked chunks: %s", reranked_chunks)
+        filtered_chunks = [chunk for chunk in reranked_chunks if chunk.score >= Config.RERANK_THRESHOLD]
         return filtered_chunks
 
-    def get_response(self, user_message, history, selected_course) -> str:
+    def select_contexts(self, ranked_chunks) -> List[str]:
         """
-        Retreive relevant chunks from the document and generate a response using the LLM.
+        Turn reranked chunks into prompt contexts, best first and without duplicates.
+        In "parent" RETRIEVAL_MODE each chunk is expanded to its full page, once per page.
+        With CONTEXT_PACKING_ENABLED, boilerplate and near-duplicates are removed and the
+        contexts are packed under CONTEXT_TOKEN_BUDGET.
         """
-        # apply guardrail 
-        if not self.is_safe_message(user_message):
-            return "⚠️ Your message was flagged for violating content guidelines."
-        reformulated_query = self.reformulate_query(history=history,query=user_message)
-        retrieved_chunks = vectordb.query(query=reformulated_query, selected_course=selected_course)
-        logger.info("Retrieved chunks: %s", retrieved_chunks)
-        
-        if hasattr(retrieved_chunks, 'points') and retrieved_chunks.points: 
-            chunks = retrieved_chunks.points
-            filtered_chunks = self.rerank_chunks(chunks, reformulated_query)
-            logger.info("Filtered chunks: %s", filtered_chunks)
-            context_str = "\n\n".join([f"Context {i + 1}:\n{content.node.text}" for i, content in enumerate(filtered_chunks)])
-        else:
-            context_str="No relevant context found."
-            
-        prompt = self.qa_prompt.format(context_str=context_str)
-        messages = [{"role": "model", "parts": [{"text": prompt}]}]
-        for user_turn, bot_turn in history:
-            messages.append({"role": "user", "parts": [{"text": user_turn}]})
-            messages.append({"role": "model", "parts": [{"text": bot_turn}]})
-        messages.append({"role": "user", "parts": [{"text": user_message}]})
-        
-        logger.info("Messages: %s", messages)
-        response = llm.complete(messages=messages)
-        response_dict = json.loads(response)
-        logger.info("LLM response: %s", response)
-        return response_dict.get("message", "")
-    
-    def get_response_with_context(self, user_message, history, selected_course):
+        contexts, seen = [], set()
+        for chunk in ranked_chunks:
+            key, text = chunk.text, chunk.text
+            if Config.RETRIEVAL_MODE == "parent":
+                parent_id = chunk.metadata.get("parent_id")
+                parent_text = services.vectordb.parent_store.get(parent_id) if parent_id else None
+                if parent_text is not None:
+                    key, text = parent_id, parent_text
+            if key not in seen:
+                seen.add(key)
+                contexts.append(text)
+        if Config.CONTEXT_PACKING_ENABLED:
+            with metrics.span("context_packing"):
+                contexts = self.context_packer.pack(contexts)
+        return contexts
+
+    async def retrieve_context(self, history, user_message, selected_course) -> Retrieval:
         """
-        Same as get_response, but also returns a list of context strings used in generation.
+        Reformulate and embed the query, check the response cache, and on a miss
+        retrieve and rerank chunks for it.
         """
-        # apply guardrail 
-        if not self.is_safe_message(user_message):
-            return "⚠️ Your message was flagged for violating content guidelines.", []
-        reformulated_query = self.reformulate_query(history=history, query=user_message)
-        retrieved_chunks = vectordb.query(query=reformulated_query, selected_course=selected_course)
-        logger.info("Retrieved chunks: %s", retrieved_chunks)
+        reformulated_query = await self.areformulate_query(history=history, query=user_message)
+        with metrics.span("embedding"):
+            query_vector = await asyncio.to_thread(services.embedder.generate_embedding, reformulated_query)
+
+        if self.cache_enabled:
+            cached = response_cache.get_similar(selected_course, query_vector)
+            if cached is not None:
+                return Retrieval(reformulated_query, query_vector, cached.contexts, cached)
+
+        with metrics.span("vector_query"):
+            retrieved_chunks = await services.vectordb.aquery(
+                query=reformulated_query, selected_course=selected_course, query_vector=query_vector
+            )
+        logger.debug("Retrieved chunks: %s", retrieved_chunks)
 
         if hasattr(retrieved_chunks, 'points') and retrieved_chunks.points:
             chunks = retrieved_chunks.points
-            filtered_chunks = self.rerank_chunks(chunks, reformulated_query)
-            logger.info("Filtered chunks: %s", filtered_chunks)
-            context_str_list = [content.node.text for content in filtered_chunks]
+            filtered_chunks = await asyncio.to_thread(self.rerank_chunks, chunks, reformulated_query)
+            logger.debug("Filtered chunks: %s", filtered_chunks)
+            return Retrieval(reformulated_query, query_vector, self.select_contexts(filtered_chunks))
+        return Retrieval(reformulated_query, query_vector, [])
+
+    async def afaq_answer(self, user_message, history, selected_course) -> Optional[str]:
+        """
+        Return a curated FAQ answer when the message closely matches an FAQ question.
+        Only self-contained messages are eligible, and a hit still goes through the
+        guardrail (whose verdict is cached), so it skips retrieval and generation only.
+        """
+        needs_rewrite, _ = self.reformulation_policy.decide(list(history), user_message)
+        if needs_rewrite:
+            return None
+        try:
+            query_vector = await asyncio.to_thread(services.embedder.generate_embedding, user_message)
+            entry = await asyncio.to_thread(services.faq_store.match, selected_course, query_vector)
+            if entry is None:
+                return None
+        except Exception as e:
+            logger.error("FAQ lookup failed: %s", e)
+            return None
+        if not await self.ais_safe_message(user_message):
+            # the full pipeline flags it, from the cached verdict
+            return None
+        logger.info("FAQ hit for: %s", user_message)
+        return entry.answer
+
+    def build_messages(self, context_str_list, history, user_message) -> list:
+        """
+        Build the answer prompt from the retrieved contexts and the conversation.
+        """
+        history = CompactHistory.wrap(history)
+        if context_str_list:
             context_str = "\n\n".join([f"Context {i + 1}:\n{c}" for i, c in enumerate(context_str_list)])
         else:
-            context_str_list = []
             context_str = "No relevant context found."
 
         prompt = self.qa_prompt.format(context_str=context_str)
+        if history.summary:
+            prompt += f"\n\nSummary of the earlier conversation:\n{history.summary}"
         messages = [{"role": "model", "parts": [{"text": prompt}]}]
-        for user_turn, bot_turn in history:
+        for user_turn, bot_turn in history.turns:
             messages.append({"role": "user", "parts": [{"text": user_turn}]})
             messages.append({"role": "model", "parts": [{"text": bot_turn}]})
         messages.append({"role": "user", "parts": [{"text": user_message}]})
+        return messages
+
+    async def aprepare_turn(self, user_message, history, selected_course) -> PreparedTurn:
+        """
+        Run the guardrail check concurrently with history compaction, reformulation and
+        retrieval, and build the answer prompt. Retrieval is dropped if the message is
+        flagged. When the answer is already known (flagged message, cache or FAQ hit) it
+        is returned instead of a prompt.
+        """
+        start = time.perf_counter()
+        if self.cache_enabled and not history:
+            cached = response_cache.get_exact(selected_course, user_message)
+            if cached is not None:
+                logger.info("Response cache exact hit for: %s", user_message)
+                metrics.inc("rag_requests_total", outcome="cache_hit")
+                return PreparedTurn(cached.answer, cached.contexts)
+
+        if self.faq_enabled:
+            answer = await self.afaq_answer(user_message, history, selected_course)
+            if answer is not None:
+                metrics.inc("rag_requests_total", outcome="faq")
+                return PreparedTurn(answer, [])
+
+        safety_task = asyncio.create_task(self.ais_safe_message(user_message))
+        try:
+            compact_history = await self.history_manager.acompact(history)
+        except BaseException:
+            safety_task.cancel()
+            raise
+        retrieval_task = asyncio.create_task(self.retrieve_context(compact_history, user_message, selected_course))
+
+        try:
+            is_safe = await safety_task
+        except BaseException:
+            retrieval_task.cancel()
+            raise
+        if not is_safe:
+            retrieval_task.cancel()
+            metrics.inc("rag_requests_total", outcome="flagged")
+            return PreparedTurn(FLAGGED_MESSAGE, [])
+
+        retrieval = await retrieval_task
+        if retrieval.cached is not None:
+            logger.info("Response cache semantic hit for: %s", retrieval.query)
+            metrics.inc("rag_requests_total", outcome="cache_hit")
+            return PreparedTurn(retrieval.cached.answer, retrieval.cached.contexts)
+
+        messages = self.build_messages(retrieval.contexts, compact_history, user_message)
+        logger.debug("Messages: %s", messages)
+        return PreparedTurn(None, retrieval.contexts, messages, retrieval, start)
 
-        logger.info("Messages: %s", messages)
-        response = llm.complete(messages=messages)
+    def _finish_turn(self, turn: PreparedTurn, answer: str, user_message, history, selected_course):
+        """
+        Record metrics for a generated answer and store it in the response cache.
+        """
+        latency = time.perf_counter() - turn.start
+        metrics.inc("rag_requests_total", outcome="answered")
+        metrics.observe("rag_request_seconds", latency)
+        if not self.cache_enabled or not answer:
+            return
+        retrieval = turn.retrieval
+        response_cache.put(selected_course, retrieval.query, retrieval.query_vector, answer, turn.contexts, latency)
+        if not history:
+            response_cache.put(selected_course, user_message, retrieval.query_vector, answer, turn.contexts, latency)
+
+    async def aget_response_with_context(self, user_message, history, selected_course):
+        """
+        Retrieve context and generate the full answer in one LLM call.
+        """
+        turn = await self.aprepare_turn(user_message, history, selected_course)
+        if turn.answer is not None:
+            return turn.answer, turn.contexts
+
+        with metrics.span("generation"):
+            response = await services.llm.acomplete(messages=turn.messages)
         response_dict = json.loads(response)
-        logger.info("LLM response: %s", response)
+        logger.debug("LLM response: %s", response)
+        answer = response_dict.get("message", "")
+
+        self._finish_turn(turn, answer, user_message, history, selected_course)
+        return answer, turn.contexts
+
+    async def astream_response(self, user_message, history, selected_course) -> AsyncIterator[str]:
+        """
+        Like aget_response_with_context, but streams the answer: yields the answer
+        text generated so far each time more of the message field arrives.
+        """
+        turn = await self.aprepare_turn(user_message, history, selected_course)
+        if turn.answer is not None:
+            yield turn.answer
+            return
+
+        streamer = JsonFieldStreamer("message")
+        answer = ""
+        generation_start = time.perf_counter()
+        async for chunk in services.llm.astream(messages=turn.messages):
+            delta = streamer.feed(chunk)
+            if delta:
+                if not answer:
+                    metrics.observe("rag_time_to_first_token_seconds", time.perf_counter() - turn.start)
+                answer += delta
+                yield answer
+        remainder = streamer.finish()
+        if remainder:
+            answer += remainder
+            yield answer
+        metrics.observe("rag_stage_seconds", time.perf_counter() - generation_start, stage="generation")
+        logger.debug("LLM response: %s", streamer.buffer)
+
+        self._finish_turn(turn, answer, user_message, history, selected_course)
+
+    def stream_response(self, user_message, history, selected_course) -> Iterator[str]:
+        """
+        Synchronous generator over astream_response.
+        """
+        return runner.iterate(self.astream_response(user_message, history, selected_course))
+
+    def get_response(self, user_message, history, selected_course) -> str:
+        """
+        Retreive relevant chunks from the document and generate a response using the LLM.
+        """
+        response, _ = self.get_response_with_context(user_message, history, selected_course)
+        return response
+
+    def get_response_with_context(self, user_message, history, selected_course):
+        """
+        Same as get_response, but also returns a list of context strings used in generation.
+        """
+        return runner.run(self.aget_response_with_context(user_message, history, selected_course))
+
+    async def aanswer_batch(self, questions: List[str], courses: List[str]) -> List[Tuple[str, List[str]]]:
+        """
+        Answer many standalone questions at once for bulk, offline workloads: one
+        embedding call, one batched vector search, batched reranking and concurrent,
+        rate-limited generation. Returns (answer, contexts) pairs in input order.
+        Questions are treated as trusted, first-turn queries, so the guardrail and
+        reformulation steps are skipped; for the same reason answers are never written
+        to the live response cache, which serves hits before moderation. A failed
+        generation yields an empty answer.
+        """
+        if not questions:
+            return []
+        with metrics.span("embedding"):
+            query_vectors = await asyncio.to_thread(services.embedder.generate_embeddings, questions)
+        with metrics.span("vector_query"):
+            results = await asyncio.to_thread(services.vectordb.query_batch, questions, courses, query_vectors=query_vectors)
+        with metrics.span("rerank"):
+            ranked_lists = await asyncio.to_thread(self.reranker.rerank_batch, [result.points for result in results], questions)
+        context_lists = [
+            self.select_contexts([chunk for chunk in ranked if chunk.score >= Config.RERANK_THRESHOLD])
+            for ranked in ranked_lists
+        ]
+
+        messages_list = [
+            self.build_messages(contexts, [], question)
+            for question, contexts in zip(questions, context_lists)
+        ]
+        with metrics.span("generation"):
+            responses = await services.llm.acomplete_batch(messages_list)
+
+        answers = []
+        for question, contexts, response in zip(questions, context_lists, responses):
+            try:
+                answer = json.loads(response).get("message", "") if response else ""
+            except (json.JSONDecodeError, AttributeError) as e:
+                logger.error("Unparseable batch answer for %r: %s", question, e)
+                answer = ""
+            answers.append((answer, contexts))
+        return answers
 
-        return response_dict.get("message", ""), context_str_list
+    def answer_batch(self, questions: List[str], courses: List[str]) -> List[Tuple[str, List[str]]]:
+        return runner.run(self.aanswer_batch(questions, courses))
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the shared background event loop, starting it on first use.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="rag-event-loop", daemon=True)
+            thread.start()
+    return _loop
+
+def run(coro):
+    """
+    Run a coroutine on the shared event loop and block until it completes.
+    Safe to call from any thread other than the loop thread itself.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+def iterate(async_generator):
+    """
+    Drive an async generator on the shared event loop, yielding its items synchronously.
+    """
+    loop = get_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(async_generator.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(async_generator.aclose(), loop).result()
+
+async def arun(coro):
+    """
+    Await a coroutine on the shared event loop from another event loop (e.g. the
+    web server's) without blocking it.
+    """
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+async def aiterate(async_generator):
+    """
+    Drive an async generator on the shared event loop, yielding its items to the caller's loop.
+    """
+    try:
+        while True:
+            try:
+                yield await arun(async_generator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        await arun(async_generator.aclose())
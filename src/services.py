@@ -0,0 +1,142 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Factories import their modules on first use, so importing this module (or anything
+# that only references `services`) loads no models, SDKs or network clients.
+
+def _create_llm():
+    from src.llm import GeminiLLM
+    return GeminiLLM()
+
+def _create_embedder():
+    from src.embedder import Embedder
+    return Embedder()
+
+def _create_vectordb():
+    from src.vector import VectorDB
+    return VectorDB()
+
+def _create_reranker():
+    from src.reranker import create_reranker
+    return create_reranker()
+
+def _create_faq_store():
+    from src.faq import FAQStore
+    return FAQStore(embedder=services.embedder)
+
+def _create_rag():
+    from src.retriever import RAG
+    return RAG()
+
+def _warm_embedder(embedder):
+    embedder.warmup()
+
+def _warm_vectordb(vectordb):
+    vectordb.lexical_index()
+    vectordb.parent_store.get("")
+
+def _warm_faq_store(faq_store):
+    faq_store.refresh()
+
+def _warm_rag(rag):
+    if Config.GUARDRAIL_EMBEDDING_ENABLED:
+        rag.guardrail.unsafe_embeddings()
+
+
+class Services:
+    """
+    Lazily constructed, process-wide singletons. Each service is built on first access,
+    at most once even under concurrent access, and can be replaced (e.g. with a fake)
+    through `override`.
+    """
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._warmers: Dict[str, Callable] = {}
+        self._instances: Dict[str, object] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable, warmer: Optional[Callable] = None):
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+        if warmer is not None:
+            self._warmers[name] = warmer
+
+    def get(self, name: str):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._locks[name]:
+                instance = self._instances.get(name)
+                if instance is None:
+                    start = time.perf_counter()
+                    instance = self._factories[name]()
+                    self._instances[name] = instance
+                    logger.info("Initialized %s in %.2fs", name, time.perf_counter() - start)
+        return instance
+
+    def override(self, name: str, instance):
+        self._instances[name] = instance
+
+    def reset(self, name: str):
+        self._instances.pop(name, None)
+
+    @property
+    def llm(self):
+        return self.get("llm")
+
+    @property
+    def embedder(self):
+        return self.get("embedder")
+
+    @property
+    def vectordb(self):
+        return self.get("vectordb")
+
+    @property
+    def reranker(self):
+        return self.get("reranker")
+
+    @property
+    def faq_store(self):
+        return self.get("faq_store")
+
+    @property
+    def rag(self):
+        return self.get("rag")
+
+    def _preload_one(self, name: str):
+        start = time.perf_counter()
+        try:
+            instance = self.get(name)
+            warmer = self._warmers.get(name)
+            if warmer is not None:
+                warmer(instance)
+        except Exception as e:
+            # e.g. an unreachable Qdrant: serve anyway and retry on first use
+            logger.error("Preloading %s failed: %s", name, e)
+        return time.perf_counter() - start
+
+    def preload(self, names: Optional[Iterable[str]] = None, max_workers: int = Config.PRELOAD_WORKERS) -> Dict[str, float]:
+        """
+        Build and warm services in parallel (model loads, index reads, client connections),
+        so the first request does not pay for them. Returns seconds spent per service.
+        """
+        names = list(names or self._factories)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preload") as executor:
+            timings = dict(zip(names, executor.map(self._preload_one, names)))
+        logger.info("Preloaded %s", ", ".join(f"{name} ({seconds:.2f}s)" for name, seconds in timings.items()))
+        return timings
+
+
+services = Services()
+services.register("llm", _create_llm)
+services.register("embedder", _create_embedder, _warm_embedder)
+services.register("vectordb", _create_vectordb, _warm_vectordb)
+services.register("reranker", _create_reranker)
+services.register("faq_store", _create_faq_store, _warm_faq_store)
+services.register("rag", _create_rag, _warm_rag)
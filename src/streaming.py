@@ -0,0 +1,81 @@
+import re
+import json
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class JsonFieldStreamer:
+    """
+    Incrementally extracts the string value of one field from a JSON object that
+    arrives in chunks, e.g. {"message": "..."} streamed from the LLM.
+    """
+    def __init__(self, field: str = "message"):
+        self.field = field
+        self.buffer = ""
+        self.position = None  # index of the next undecoded character of the value
+        self.done = False
+        self._key_pattern = re.compile(r'"?%s"?\s*:\s*"' % re.escape(field))
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add a chunk and return the newly decoded part of the field value.
+        """
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.position is None:
+            match = self._key_pattern.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+        return self._decode()
+
+    def _decode(self) -> str:
+        decoded = []
+        i = self.position
+        while i < len(self.buffer):
+            char = self.buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                i += 1
+                continue
+            # escape sequence: wait for the rest of it if it is split across chunks
+            if i + 1 >= len(self.buffer):
+                break
+            code = self.buffer[i + 1]
+            if code == "u":
+                if i + 6 > len(self.buffer):
+                    break
+                code_point = int(self.buffer[i + 2:i + 6], 16)
+                if 0xD800 <= code_point < 0xDC00:
+                    # surrogate pair: combine with the following \uXXXX escape
+                    if i + 12 > len(self.buffer):
+                        break
+                    low = int(self.buffer[i + 8:i + 12], 16)
+                    code_point = 0x10000 + ((code_point - 0xD800) << 10) + (low - 0xDC00)
+                    i += 6
+                decoded.append(chr(code_point))
+                i += 6
+            else:
+                decoded.append(ESCAPES.get(code, code))
+                i += 2
+        self.position = i
+        return "".join(decoded)
+
+    def finish(self) -> str:
+        """
+        Call once the stream ends. If the field never appeared, fall back to parsing the
+        whole response, or return it as plain text.
+        """
+        if self.position is not None:
+            return ""
+        try:
+            value = json.loads(self.buffer)
+        except json.JSONDecodeError:
+            return self.buffer
+        if isinstance(value, dict):
+            return str(value.get(self.field, ""))
+        return self.buffer
@@ -1,84 +1,219 @@
+import os
+import asyncio
 import logging
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue
+from pathlib import Path
+from typing import List
 from src.config import Config
-from src.embedder import Embedder
+from src.services import services
+from src.backends import QueryResult, create_backend
+from src.bm25 import BM25Index, reciprocal_rank_fusion
 from src.parser import parse_pdf
+from src.cache import response_cache
+from src.manifest import Manifest, file_hash
+from src.chunker import ParentStore, chunk_settings
 
 logger = logging.getLogger(__name__)
-embedder = Embedder()
 
 class VectorDB():
-    def __init__(self):        
-        self.client = QdrantClient(
-            url=f"http://{Config.QDRANT_HOST}:{Config.QDRANT_PORT}",
-            api_key=Config.QDRANT_API_KEY
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+        self.parent_store = ParentStore()
+        self._lexical_index = None
+        self._lexical_index_mtime = None
+
+    def _upsert(self, documents):
+        self.backend.upsert(
+            ids=[doc.id_ for doc in documents],
+            vectors=[doc.embedding for doc in documents],
+            payloads=[{"metadata": doc.metadata, "text": doc.text} for doc in documents],
         )
-        logger.info(f"Connected to Qdrant at {Config.QDRANT_HOST}:{Config.QDRANT_PORT}")
-        self.collection_name = Config.COLLECTION_NAME
-        
-        if not self.client.collection_exists(collection_name=self.collection_name):
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=Embedder.get_dimension(),
-                    distance=Distance.COSINE
-                ),
-            )
-        logger.info(f"Collection '{self.collection_name}' is ready.")
+        return documents
+
+    def _delete(self, point_ids):
+        self.backend.delete(list(point_ids))
+
+    def _rebuild_lexical_index(self):
+        """
+        Rebuild the BM25 index over every stored chunk and persist it for query processes.
+        """
+        self._lexical_index = BM25Index.build(self.backend.iter_points())
+        self._lexical_index.save(Config.BM25_INDEX_PATH)
+        self._lexical_index_mtime = os.path.getmtime(Config.BM25_INDEX_PATH)
+
+    def lexical_index(self) -> BM25Index:
+        """
+        Return the BM25 index, reloading it if an ingest run has rewritten it on disk.
+        """
+        try:
+            mtime = os.path.getmtime(Config.BM25_INDEX_PATH)
+        except FileNotFoundError:
+            mtime = None
+        if self._lexical_index is None or mtime != self._lexical_index_mtime:
+            self._lexical_index = BM25Index.load(Config.BM25_INDEX_PATH)
+            self._lexical_index_mtime = mtime
+        return self._lexical_index
+
+    @staticmethod
+    def _pages_from_documents(documents) -> dict:
+        """
+        Group document IDs by filename and page into the manifest page layout.
+        """
+        files = {}
+        for doc in documents:
+            pages = files.setdefault(doc.metadata["filename"], {})
+            page = pages.setdefault(str(doc.metadata["page"]), {"hash": doc.metadata["page_hash"], "ids": []})
+            page["ids"].append(doc.id_)
+        return files
 
     async def insert(self):
-        documents = await parse_pdf(file_path=Config.DATA_PATH)
-        
-        points = [
-            PointStruct(
-                id=doc.id_,
-                vector=doc.embedding,
-                payload={"metadata": doc.metadata, "text": doc.text},
-            )
-            for doc in documents
+        """
+        Parse, embed and upsert every PDF in DATA_PATH, replacing what the manifest tracks.
+        """
+        manifest = Manifest()
+        previous_ids = {point for name in manifest.files for point in manifest.point_ids(name)}
+        parents = {}
+        documents = await parse_pdf(file_path=Config.DATA_PATH, parents=parents)
+        points = self._upsert(documents)
+        self._delete(previous_ids - {doc.id_ for doc in documents})
+
+        manifest.files = {
+            name: {"file_hash": file_hash(Path(Config.DATA_PATH) / name), "pages": pages}
+            for name, pages in self._pages_from_documents(documents).items()
+        }
+        manifest.settings = chunk_settings()
+        manifest.save()
+        self.parent_store.update(parents, live_ids=set(parents))
+        self._rebuild_lexical_index()
+        response_cache.invalidate()
+        logger.info(f"Inserted {len(points)} points into the vector database.")
+
+    async def sync(self):
+        """
+        Incrementally re-index DATA_PATH. Only new or changed files are parsed, only
+        pages whose content hash changed are embedded and upserted, and points for
+        changed, removed or deleted pages are dropped. If the chunking settings changed,
+        every file is re-indexed.
+        """
+        manifest = Manifest()
+        stale_ids = []
+        settings = chunk_settings()
+        if manifest.settings != settings:
+            if manifest.files:
+                logger.info("Chunking settings changed, re-indexing every file.")
+            stale_ids.extend(point for name in manifest.files for point in manifest.point_ids(name))
+            manifest.files = {}
+            manifest.settings = settings
+
+        filepaths = {p.name: p for p in Path(Config.DATA_PATH).iterdir() if p.suffix.lower() == ".pdf"}
+        file_hashes = {name: file_hash(path) for name, path in filepaths.items()}
+        changed = [
+            path for name, path in filepaths.items()
+            if manifest.files.get(name, {}).get("file_hash") != file_hashes[name]
         ]
-        
-        self.client.upload_points(
-            collection_name=self.collection_name, 
-            points=points, 
-            batch_size=64, 
-            parallel=4
+
+        for name in [name for name in manifest.files if name not in filepaths]:
+            stale_ids.extend(manifest.point_ids(name))
+            del manifest.files[name]
+
+        parsed_pages = {}
+        parents = {}
+
+        def is_new_page(doc):
+            filename, page, page_hash = doc.metadata["filename"], str(doc.metadata["page"]), doc.metadata["page_hash"]
+            parsed_pages.setdefault(filename, {})[page] = page_hash
+            return manifest.pages(filename).get(page, {}).get("hash") != page_hash
+
+        documents = await parse_pdf(file_path=Config.DATA_PATH, filepaths=changed, select=is_new_page, parents=parents) if changed else []
+        new_pages = self._pages_from_documents(documents)
+
+        for path in changed:
+            old_pages = manifest.pages(path.name)
+            pages = {}
+            for page, page_hash in parsed_pages.get(path.name, {}).items():
+                if old_pages.get(page, {}).get("hash") == page_hash:
+                    pages[page] = old_pages[page]
+                else:
+                    pages[page] = new_pages[path.name][page]
+            stale_ids.extend(
+                point for page, entry in old_pages.items()
+                if pages.get(page) is not entry
+                for point in entry["ids"]
+            )
+            manifest.files[path.name] = {"file_hash": file_hashes[path.name], "pages": pages}
+
+        if documents:
+            self._upsert(documents)
+        self._delete(set(stale_ids) - {doc.id_ for doc in documents})
+        manifest.save()
+        if parents or stale_ids or not os.path.exists(self.parent_store.path):
+            self.parent_store.update(parents, live_ids=manifest.parent_ids())
+        if documents or stale_ids or not os.path.exists(Config.BM25_INDEX_PATH):
+            self._rebuild_lexical_index()
+            response_cache.invalidate()
+        logger.info(
+            f"Synced vector database: {len(changed)} changed file(s), "
+            f"{len(documents)} point(s) upserted, {len(stale_ids)} point(s) removed."
         )
-        logger.info(f"Inserted {len(points)} points into the collection '{self.collection_name}'.")
         
-    def query(self, query: str, selected_course: str, top_k: int = Config.RETRIEVE_TOP_K):
+    def query(self, query: str, selected_course: str, top_k: int = Config.RETRIEVE_TOP_K, query_vector=None):
         """
         Query the vector database for similar documents.
+        A precomputed query embedding can be passed to skip re-encoding the query.
+        With HYBRID_SEARCH enabled, dense results are fused with BM25 results using
+        reciprocal rank fusion.
         """
-        query_vector = embedder.generate_embedding(query)
+        if query_vector is None:
+            query_vector = services.embedder.generate_embedding(query)
         filename = Config.COURSE_TO_FILE_MAP.get(selected_course)
-        
-        results = self.client.query_points(
-            collection_name=self.collection_name,
-            query=query_vector,
-            query_filter=Filter(must=[FieldCondition(key='metadata.filename', match=MatchValue(value=filename))]),
-            limit=top_k,
-            with_payload=True,
-            with_vectors=False,     
+        dense_results = self.backend.query(query_vector, filename, top_k)
+        if not Config.HYBRID_SEARCH:
+            return dense_results
+
+        lexical_results = self.lexical_index().search(query, filename, top_k)
+        return QueryResult(points=reciprocal_rank_fusion([dense_results.points, lexical_results], top_k))
+    
+    async def aquery(self, query: str, selected_course: str, top_k: int = Config.RETRIEVE_TOP_K, query_vector=None):
+        """
+        Async variant of `query`: the dense search is awaited on the backend's async
+        client while the BM25 search runs in a worker thread.
+        """
+        if query_vector is None:
+            query_vector = await asyncio.to_thread(services.embedder.generate_embedding, query)
+        filename = Config.COURSE_TO_FILE_MAP.get(selected_course)
+        if not Config.HYBRID_SEARCH:
+            return await self.backend.aquery(query_vector, filename, top_k)
+
+        dense_results, lexical_results = await asyncio.gather(
+            self.backend.aquery(query_vector, filename, top_k),
+            asyncio.to_thread(lambda: self.lexical_index().search(query, filename, top_k)),
         )
-        
-        return results
+        return QueryResult(points=reciprocal_rank_fusion([dense_results.points, lexical_results], top_k))
+
+    def query_batch(self, queries: List[str], selected_courses: List[str], top_k: int = Config.RETRIEVE_TOP_K, query_vectors=None) -> list:
+        """
+        Query the vector database for several queries in one round trip.
+        Returns one result per query, in input order.
+        """
+        if query_vectors is None:
+            query_vectors = services.embedder.generate_embeddings(queries)
+        filenames = [Config.COURSE_TO_FILE_MAP.get(course) for course in selected_courses]
+        dense_results = self.backend.query_batch(query_vectors, filenames, top_k)
+        if not Config.HYBRID_SEARCH:
+            return dense_results
+
+        lexical_index = self.lexical_index()
+        return [
+            QueryResult(points=reciprocal_rank_fusion([dense.points, lexical_index.search(query, filename, top_k)], top_k))
+            for query, filename, dense in zip(queries, filenames, dense_results)
+        ]
     
     def clear(self):
         """
         Clear all data in the vector database 
         """
-        if self.client.collection_exists(collection_name=self.collection_name):
-            self.client.delete_collection(
-                collection_name=self.collection_name
-            )
-                    
-        self.client.create_collection(
-            collection_name=self.collection_name,
-            vectors_config=VectorParams(
-                size=Embedder.get_dimension(),
-                distance=Distance.COSINE
-            ),
-        )
-        logger.info(f"Cleared all data in the collection '{self.collection_name}'.")
\ No newline at end of file
+        self.backend.clear()
+        Manifest().clear()
+        self.parent_store.clear()
+        self._rebuild_lexical_index()
+        response_cache.invalidate()
+        logger.info("Cleared all data in the vector database.")
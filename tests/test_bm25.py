@@ -0,0 +1,49 @@
+import pytest
+from src.backends import ScoredChunk
+from src.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+def payload(text: str, filename: str = "fsktm.pdf") -> dict:
+    return {"text": text, "metadata": {"filename": filename}}
+
+@pytest.fixture
+def index():
+    return BM25Index.build([
+        ("a", payload("WIX1002 Fundamentals of Programming is a core course.")),
+        ("b", payload("Elective courses are chosen in year two.")),
+        ("c", payload("The library opens at 8am. The library closes at 10pm.")),
+        ("d", payload("WIX1002 is also offered to medicine students.", "medicine.pdf")),
+    ])
+
+def test_tokenize_keeps_course_codes_whole():
+    assert tokenize("Take WIX1002, then WIA2001!") == ["take", "wix1002", "then", "wia2001"]
+
+def test_search_ranks_matching_chunks_within_the_partition(index):
+    results = index.search("WIX1002 core course", "fsktm.pdf", top_k=3)
+    assert [chunk.id for chunk in results] == ["a"]
+    assert results[0].payload["metadata"]["filename"] == "fsktm.pdf"
+
+def test_search_favours_higher_term_frequency(index):
+    results = index.search("library courses", "fsktm.pdf", top_k=3)
+    assert results[0].id == "c"
+    assert {chunk.id for chunk in results} == {"b", "c"}
+
+def test_search_unknown_partition_or_terms(index):
+    assert index.search("WIX1002", "unknown.pdf", top_k=3) == []
+    assert index.search("nothing matches", "fsktm.pdf", top_k=3) == []
+
+def test_save_and_load_round_trip(index, tmp_path):
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.search("WIX1002", "medicine.pdf", top_k=1)[0].id == "d"
+    assert BM25Index.load(str(tmp_path / "missing.json")).partitions == {}
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [ScoredChunk("x", 0.9, {}), ScoredChunk("y", 0.8, {}), ScoredChunk("z", 0.7, {})]
+    lexical = [ScoredChunk("y", 12.0, {}), ScoredChunk("w", 9.0, {})]
+    fused = reciprocal_rank_fusion([dense, lexical], top_k=3, k=60)
+    assert [chunk.id for chunk in fused] == ["y", "x", "w"]
+    assert fused[0].score == pytest.approx(1 / 62 + 1 / 61)
+
+def test_reciprocal_rank_fusion_handles_empty_lists():
+    assert reciprocal_rank_fusion([[], []], top_k=5) == []
@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+import pytest
+from src import cache as cache_module
+from src.cache import ResponseCache
+from src.metrics import metrics
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    A controllable clock for the cache's TTL checks, starting at the real monotonic time
+    (which entries are stamped with).
+    """
+    now = [time.monotonic()]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def put(cache, course, query, embedding=(1.0, 0.0), answer=None, latency=1.0):
+    cache.put(course, query, list(embedding), answer or f"answer to {query}", ["context"], latency)
+
+def test_exact_lookup_normalizes_case_whitespace_and_punctuation():
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "What are the core courses?")
+    assert cache.get_exact("CS", "  what are the  CORE courses ").answer == "answer to What are the core courses?"
+    assert cache.get_exact("CS", "What are the electives?") is None
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "What are the core courses?")
+    clock[0] += 59
+    assert cache.get_exact("CS", "What are the core courses?") is not None
+    clock[0] += 2
+    assert cache.get_exact("CS", "What are the core courses?") is None
+    assert cache.get_similar("CS", [1.0, 0.0]) is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_size=2, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "first")
+    put(cache, "CS", "second")
+    assert cache.get_exact("CS", "first") is not None  # now the most recently used
+    put(cache, "CS", "third")
+    assert cache.get_exact("CS", "second") is None
+    assert cache.get_exact("CS", "first") is not None
+    assert cache.get_exact("CS", "third") is not None
+
+def test_lookups_are_scoped_per_course():
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "What are the core courses?", answer="CS core courses")
+    put(cache, "Medicine", "What are the core courses?", answer="Medicine core courses")
+    assert cache.get_exact("CS", "What are the core courses?").answer == "CS core courses"
+    assert cache.get_exact("Medicine", "What are the core courses?").answer == "Medicine core courses"
+    assert cache.get_exact("Pharmacy", "What are the core courses?") is None
+    assert cache.get_similar("Pharmacy", [1.0, 0.0]) is None
+
+def test_semantic_lookup_respects_the_similarity_threshold():
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "What are the core courses?", embedding=(1.0, 0.0))
+    put(cache, "CS", "When does the library open?", embedding=(0.0, 1.0))
+    # cosine 0.949 with the first entry: a hit, and vectors need not be normalized
+    assert cache.get_similar("CS", [3.0, 1.0]).answer == "answer to What are the core courses?"
+    # cosine 0.707 with both entries: below the threshold
+    assert cache.get_similar("CS", [1.0, 1.0]) is None
+
+def test_invalidate_drops_every_entry():
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "What are the core courses?")
+    put(cache, "Medicine", "What are the core courses?")
+    cache.invalidate()
+    assert cache.get_exact("CS", "What are the core courses?") is None
+    assert cache.get_similar("Medicine", [1.0, 0.0]) is None
+
+def test_stats_report_hit_rate_and_latency_saved():
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    put(cache, "CS", "What are the core courses?", latency=2.5)
+    cache.get_exact("CS", "What are the core courses?")
+    cache.get_similar("CS", [1.0, 0.1])
+    cache.get_similar("CS", [0.0, 1.0])
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["latency_saved_seconds"] == pytest.approx(5.0)
+
+def test_module_cache_is_exported_as_gauges():
+    rendered = metrics.render()
+    assert "response_cache_hit_rate " in rendered
+    assert "response_cache_latency_saved_seconds " in rendered
+    assert "response_cache_size " in rendered
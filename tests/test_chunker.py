@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from src.chunker import MarkdownChunker, ParentStore, chunk_page
+
+def words(text: str) -> int:
+    return len(text.split())
+
+def chunker(max_tokens: int = 20, overlap_tokens: int = 0) -> MarkdownChunker:
+    return MarkdownChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens, count_tokens=words)
+
+def test_small_page_is_one_chunk():
+    text = "# Programme\n\nCore courses are listed below."
+    assert chunker().split(text) == ["# Programme\n\nCore courses are listed below."]
+
+def test_chunks_respect_the_token_limit_and_repeat_the_heading():
+    text = "## Electives\n\n" + "\n\n".join(f"Paragraph {i} has exactly six words." for i in range(6))
+    chunks = chunker(max_tokens=16).split(text)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith("## Electives\n\n")
+        assert words(chunk) <= 16
+
+def test_headings_start_new_chunks():
+    text = "# A\n\nFirst section text.\n\n# B\n\nSecond section text."
+    assert chunker().split(text) == ["# A\n\nFirst section text.", "# B\n\nSecond section text."]
+
+def test_tables_split_between_rows_with_the_header_repeated():
+    header = "| Code | Course |\n| --- | --- |"
+    rows = [f"| WIX100{i} | Course number {i} |" for i in range(8)]
+    chunks = chunker(max_tokens=30).split(header + "\n" + "\n".join(rows))
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith(header)
+        assert all(line.startswith("|") for line in chunk.splitlines())
+    body_rows = [line for chunk in chunks for line in chunk.splitlines()[2:]]
+    assert body_rows == rows
+
+def test_long_sentences_fall_back_to_words():
+    text = " ".join(f"word{i}" for i in range(50))
+    chunks = chunker(max_tokens=10).split(text)
+    assert all(words(chunk) <= 10 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+def test_consecutive_chunks_share_overlap():
+    text = "\n\n".join(f"Block {i} text." for i in range(6))  # three words per block
+    chunks = chunker(max_tokens=9, overlap_tokens=3).split(text)
+    assert len(chunks) == 3
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.split("\n\n")[-1] == current.split("\n\n")[0]
+
+def test_page_strategy_keeps_whole_pages(monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "CHUNK_STRATEGY", "page")
+    page = SimpleNamespace(id_="page-1", text="Whole page", metadata={"filename": "a.pdf", "page": 1})
+    [chunk] = chunk_page(page)
+    assert chunk is page
+    assert chunk.metadata["parent_id"] == "page-1" and chunk.metadata["chunk"] == 0
+
+def test_parent_store_updates_prunes_and_reloads(tmp_path):
+    path = str(tmp_path / "parents.json")
+    store = ParentStore(path)
+    store.update({"p1": {"text": "one"}, "p2": {"text": "two"}})
+    store.update({"p3": {"text": "three"}}, live_ids={"p1", "p3"})
+    assert store.get("p1") == "one" and store.get("p2") is None and store.get("p3") == "three"
+    assert ParentStore(path).get("p3") == "three"
+    store.clear()
+    assert ParentStore(path).get("p1") is None
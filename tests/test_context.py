@@ -0,0 +1,63 @@
+from src.context import ContextPacker
+from src.history import estimate_tokens
+from src.metrics import metrics
+
+HEADER = "Faculty of Computer Science Handbook 2024/2025"
+
+def page(body: str, number: int) -> str:
+    return f"{HEADER}\n## Programme Structure\n{body}\nPage {number} of 40"
+
+def packer(**kwargs) -> ContextPacker:
+    settings = {"token_budget": 2000, "duplicate_threshold": 0.8, "boilerplate_min_repeats": 3, "min_tokens": 20}
+    return ContextPacker(**{**settings, **kwargs})
+
+def test_strips_repeated_lines_and_page_numbers_but_keeps_headings():
+    contexts = [
+        page("Core courses are WIX1001 and WIX1002.", 3),
+        page("Electives are chosen in year two.", 4),
+        page("The industrial training lasts 24 weeks.", 5),
+    ]
+    packed = packer().pack(contexts)
+    assert packed[0] == "## Programme Structure\nCore courses are WIX1001 and WIX1002."
+    assert all(HEADER not in context and "Page" not in context for context in packed)
+
+def test_lines_repeated_in_few_contexts_are_kept():
+    contexts = [page("Core courses are WIX1001 and WIX1002.", 3), page("Electives are chosen in year two.", 4)]
+    assert all(context.startswith(HEADER) for context in packer().pack(contexts))
+
+def test_drops_near_duplicates_and_fragments_of_better_contexts():
+    best = "Students must complete 120 credit hours, including the core courses WIX1001 and WIX1002, within four years."
+    reworded = best.replace("four years.", "four years!")
+    fragment = "including the core courses WIX1001 and WIX1002, within four years"
+    other = "Elective courses are chosen from the specialization list with the academic advisor."
+    assert packer().pack([best, reworded, fragment, other]) == [best, other]
+
+def test_packs_best_first_under_the_budget():
+    contexts = [" ".join(f"first{i}" for i in range(60)), " ".join(f"second{i}" for i in range(60)), "short third context"]
+    packed = packer(token_budget=150).pack(contexts)
+    assert packed[0] == contexts[0]
+    assert packed[1].startswith("second0") and packed[1].endswith("…")
+    assert sum(estimate_tokens(context) for context in packed) <= 150 + len(packed)
+    assert "short third context" not in packed
+
+def test_skips_contexts_when_too_little_budget_remains():
+    contexts = ["a " * 270, "b " * 200, "tiny context"]
+    packed = packer(token_budget=150, min_tokens=40).pack(contexts)
+    assert len(packed) == 2
+    assert packed[0].startswith("a a")
+    assert packed[1] == "tiny context"
+
+def test_reports_tokens_before_and_after():
+    before = dict(metrics._counters)
+    contexts = [page("Core courses are WIX1001 and WIX1002.", 3)] * 3
+    packer().pack(contexts)
+
+    def delta(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return metrics._counters.get(key, 0) - before.get(key, 0)
+    assert delta("rag_context_tokens_total", stage="retrieved") == sum(estimate_tokens(c) for c in contexts)
+    assert 0 < delta("rag_context_tokens_total", stage="packed") < delta("rag_context_tokens_total", stage="retrieved")
+    assert delta("rag_context_dropped_total", reason="duplicate") == 2
+
+def test_empty_input():
+    assert packer().pack([]) == []
@@ -0,0 +1,100 @@
+import re
+import json
+import zlib
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.config import Config
+from src.faq import FAQStore
+
+class CountingEmbedder:
+    """
+    Hashed bag-of-words vectors, recording every text it embeds.
+    """
+    def __init__(self):
+        self.embedded = []
+
+    def generate_embedding(self, text):
+        vector = np.zeros(384, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % 384] += 1.0
+        return vector
+
+    def generate_embeddings(self, texts):
+        self.embedded.extend(texts)
+        return [self.generate_embedding(text) for text in texts]
+
+@pytest.fixture
+def faq(tmp_path, monkeypatch):
+    """
+    A store over an empty FAQ folder, re-checked on every lookup, and helpers to edit the folder.
+    """
+    monkeypatch.setattr(Config, "FAQ_RELOAD_INTERVAL", 0)
+    (tmp_path / "faq").mkdir()
+    store = FAQStore(faq_dir=str(tmp_path / "faq"), index_path=str(tmp_path / "index" / "faq.json"), embedder=CountingEmbedder())
+
+    def write(name, records):
+        (tmp_path / "faq" / name).write_text(json.dumps(records))
+
+    def remove(name):
+        (tmp_path / "faq" / name).unlink()
+    return SimpleNamespace(store=store, write=write, remove=remove)
+
+def ask(store, course, question):
+    entry = store.match(course, store.embedder.generate_embedding(question))
+    return entry.answer if entry else None
+
+QUESTION = "How many credits do I need to graduate?"
+
+def test_matches_are_partitioned_by_course(faq):
+    faq.write("general.json", [
+        {"course": "Medicine", "question": QUESTION, "answer": "Medicine needs 240 credits."},
+        {"course": "Computer Science", "question": QUESTION, "answer": "Computer Science needs 120 credits."},
+        {"course": "Medicine", "question": "When do clinical rotations start?", "answer": "In year three."},
+        {"course": "Astrology", "question": QUESTION, "answer": "Not a course."},
+    ])
+    assert ask(faq.store, "Computer Science", QUESTION) == "Computer Science needs 120 credits."
+    assert ask(faq.store, "Medicine", QUESTION) == "Medicine needs 240 credits."
+    assert ask(faq.store, "Pharmacy", QUESTION) is None
+    assert ask(faq.store, "Astrology", QUESTION) is None
+    assert ask(faq.store, "Computer Science", "When do clinical rotations start?") is None
+    assert {course: stop - start for course, (start, stop) in faq.store.index.partitions.items()} == {"Computer Science": 1, "Medicine": 2}
+
+def test_below_threshold_questions_do_not_match(faq):
+    faq.write("general.json", [{"course": "Pharmacy", "question": QUESTION, "answer": "120 credits."}])
+    assert ask(faq.store, "Pharmacy", "Where is the pharmacy lab?") is None
+
+def test_changed_files_are_hot_reloaded_reusing_unchanged_vectors(faq):
+    faq.write("general.json", [{"course": "Pharmacy", "question": QUESTION, "answer": "120 credits."}])
+    assert ask(faq.store, "Pharmacy", QUESTION) == "120 credits."
+    faq.store.embedder.embedded.clear()
+
+    faq.write("general.json", [
+        {"course": "Pharmacy", "question": QUESTION, "answer": "Now 124 credits."},
+        {"course": "Pharmacy", "question": "Who is the programme coordinator?", "answer": "Dr. Lim."},
+    ])
+    assert ask(faq.store, "Pharmacy", QUESTION) == "Now 124 credits."
+    assert ask(faq.store, "Pharmacy", "Who is the programme coordinator?") == "Dr. Lim."
+    assert faq.store.embedder.embedded == ["Who is the programme coordinator?"]
+
+    faq.write("extra.json", [{"course": "Medicine", "question": QUESTION, "answer": "240 credits."}])
+    assert ask(faq.store, "Medicine", QUESTION) == "240 credits."
+    faq.remove("extra.json")
+    assert ask(faq.store, "Medicine", QUESTION) is None
+
+def test_reload_checks_are_throttled(faq, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_RELOAD_INTERVAL", 3600)
+    faq.write("general.json", [{"course": "Pharmacy", "question": QUESTION, "answer": "120 credits."}])
+    assert ask(faq.store, "Pharmacy", QUESTION) == "120 credits."
+    faq.write("general.json", [{"course": "Pharmacy", "question": QUESTION, "answer": "Now 124 credits."}])
+    assert ask(faq.store, "Pharmacy", QUESTION) == "120 credits."
+    faq.store._checked_at -= 3600
+    assert ask(faq.store, "Pharmacy", QUESTION) == "Now 124 credits."
+
+def test_persisted_index_is_loaded_without_embedding(faq):
+    faq.write("general.json", [{"course": "Pharmacy", "question": QUESTION, "answer": "120 credits."}])
+    faq.store.refresh()
+    embedder = CountingEmbedder()
+    reloaded = FAQStore(faq_dir=faq.store.faq_dir, index_path=faq.store.index_path, embedder=embedder)
+    assert ask(reloaded, "Pharmacy", QUESTION) == "120 credits."
+    assert embedder.embedded == []
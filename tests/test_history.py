@@ -0,0 +1,73 @@
+import json
+import asyncio
+from src.history import CompactHistory, HistoryManager, estimate_tokens
+
+PROMPT = "Summary so far: {summary}\nNew turns:\n{new_turns}\nAt most {max_words} words."
+
+class RecordingLLM:
+    """
+    Summarizes by appending the folded user questions to the previous summary.
+    """
+    def __init__(self, fail: bool = False):
+        self.prompts = []
+        self.fail = fail
+
+    async def acomplete(self, messages):
+        self.prompts.append(messages)
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        previous = messages.split("Summary so far: ", 1)[1].split("\n", 1)[0]
+        questions = [line[len("User: "):] for line in messages.splitlines() if line.startswith("User: ")]
+        summary = " ".join(([] if previous == "(empty)" else [previous]) + questions)
+        return json.dumps({"summary": summary})
+
+def conversation(n: int, size: int = 10):
+    return [(f"q{i}" + "x" * size, f"a{i}" + "y" * size) for i in range(n)]
+
+def compact(manager, history) -> CompactHistory:
+    return asyncio.run(manager.acompact(history))
+
+def test_short_history_is_kept_verbatim():
+    llm = RecordingLLM()
+    manager = HistoryManager(llm, PROMPT, keep_turns=4, fold_stride=2, token_budget=10_000)
+    result = compact(manager, conversation(4))
+    assert result == CompactHistory("", conversation(4))
+    assert llm.prompts == []
+
+def test_folds_in_strides_and_keeps_at_least_keep_turns():
+    manager = HistoryManager(RecordingLLM(), PROMPT, keep_turns=4, fold_stride=2, token_budget=10_000)
+    for n in range(5, 12):
+        result = compact(manager, conversation(n))
+        assert len(result.turns) >= 4
+        assert (n - len(result.turns)) % 2 == 0
+        assert result.turns == conversation(n)[n - len(result.turns):]
+
+def test_each_turn_is_summarized_once():
+    llm = RecordingLLM()
+    manager = HistoryManager(llm, PROMPT, keep_turns=2, fold_stride=2, token_budget=10_000)
+    for n in range(1, 9):
+        result = compact(manager, conversation(n))
+    assert len(llm.prompts) == 3  # folds at 4, 6 and 8 turns
+    folded = [line for prompt in llm.prompts for line in prompt.splitlines() if line.startswith("User: ")]
+    assert len(folded) == len(set(folded)) == 6
+    assert result.summary.split() == [question for question, _ in conversation(6)]
+
+    compact(manager, conversation(8))
+    assert len(llm.prompts) == 3
+
+def test_token_budget_folds_more_but_keeps_the_newest_turn():
+    manager = HistoryManager(RecordingLLM(), PROMPT, keep_turns=4, fold_stride=4, token_budget=30)
+    history = conversation(4, size=40)
+    result = compact(manager, history)
+    assert result.turns == history[-1:]
+    assert result.summary
+    assert sum(estimate_tokens(u) + estimate_tokens(b) for u, b in result.turns) <= 30
+
+    tiny_budget = HistoryManager(RecordingLLM(), PROMPT, keep_turns=4, fold_stride=4, token_budget=5)
+    assert compact(tiny_budget, history).turns == history[-1:]
+
+def test_failed_summary_falls_back_to_the_last_good_one():
+    manager = HistoryManager(RecordingLLM(fail=True), PROMPT, keep_turns=2, fold_stride=2, token_budget=10_000)
+    result = compact(manager, conversation(4))
+    assert result.summary == ""
+    assert result.turns == conversation(4)[2:]
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from google.genai import errors
+from src import llm as llm_module
+from src.fakes import FakeGeminiClient
+from src.llm import GeminiLLM
+from src.ratelimit import RateLimiter
+
+@pytest.fixture
+def delays(monkeypatch):
+    """
+    Record backoff delays instead of sleeping, with jitter pinned to its upper bound.
+    """
+    recorded = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(seconds, *args, **kwargs):
+        recorded.append(seconds)
+        await real_sleep(0)
+    monkeypatch.setattr(llm_module.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(llm_module.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(llm_module.config, "LLM_RETRY_BASE_DELAY", 1.0)
+    monkeypatch.setattr(llm_module.config, "LLM_RETRY_MAX_DELAY", 3.0)
+    return recorded
+
+def make_llm(client: FakeGeminiClient, max_retries: int = 5) -> GeminiLLM:
+    llm = GeminiLLM(client=client, rate_limiter=RateLimiter(requests_per_minute=0, tokens_per_minute=0))
+    llm.max_retries = max_retries
+    return llm
+
+def test_acomplete_retries_quota_errors_with_capped_backoff(delays):
+    client = FakeGeminiClient(failures=3)
+    response = asyncio.run(make_llm(client).acomplete("What are the core courses?"))
+    assert "core courses" in response
+    assert client.calls == 4
+    assert delays == [1.0, 2.0, 3.0]
+
+def test_acomplete_gives_up_after_max_retries(delays):
+    client = FakeGeminiClient(failures=10)
+    with pytest.raises(errors.ClientError) as raised:
+        asyncio.run(make_llm(client, max_retries=2).acomplete("hello"))
+    assert raised.value.code == 429
+    assert client.calls == 3
+    assert len(delays) == 2
+
+def test_acomplete_does_not_retry_client_errors(delays):
+    client = FakeGeminiClient(failures=1, failure_code=400)
+    with pytest.raises(errors.ClientError):
+        asyncio.run(make_llm(client).acomplete("hello"))
+    assert client.calls == 1
+    assert delays == []
+
+def test_astream_retries_before_the_first_chunk(delays):
+    client = FakeGeminiClient(failures=2)
+
+    async def collect():
+        return "".join([chunk async for chunk in make_llm(client).astream("hello")])
+    assert "core courses" in asyncio.run(collect())
+    assert client.calls == 3
+    assert delays == [1.0, 2.0]
+
+def test_acomplete_batch_keeps_input_order(delays):
+    client = FakeGeminiClient()
+    responses = asyncio.run(make_llm(client).acomplete_batch([
+        '{"reformulated_message": ""}',
+        "What are the core courses?",
+    ]))
+    assert "reformulated_message" in responses[0]
+    assert "message" in responses[1]
+
+def test_acomplete_batch_returns_none_for_failed_items(delays):
+    client = FakeGeminiClient(failures=1, failure_code=400)
+    responses = asyncio.run(make_llm(client).acomplete_batch([
+        "What are the core courses?",
+        "What are the core courses?",
+    ]))
+    assert responses[0] is None
+    assert "message" in responses[1]
@@ -0,0 +1,64 @@
+import threading
+import numpy as np
+from src.backends import LocalBackend
+
+DIM = 384
+
+def vector(i: int) -> list:
+    v = np.zeros(DIM, dtype=np.float32)
+    v[i % DIM] = 1.0
+    return v.tolist()
+
+def payload(text: str, filename: str) -> dict:
+    return {"text": text, "metadata": {"filename": filename}}
+
+def test_upsert_query_and_delete(tmp_path):
+    backend = LocalBackend(path=str(tmp_path))
+    backend.upsert(["a", "b", "c"], [vector(0), vector(1), vector(2)],
+                   [payload("A", "x.pdf"), payload("B", "y.pdf"), payload("C", "x.pdf")])
+    assert [p.id for p in backend.query(vector(2), "x.pdf", top_k=2).points] == ["c", "a"]
+    assert backend.query(vector(1), "missing.pdf", top_k=2).points == []
+
+    backend.upsert(["a"], [vector(5)], [payload("A2", "x.pdf")])
+    backend.delete(["c"])
+    top = backend.query(vector(5), "x.pdf", top_k=5).points
+    assert [(p.id, p.payload["text"]) for p in top] == [("a", "A2")]
+    assert sorted(point for point, _ in backend.iter_points()) == ["a", "b"]
+
+def test_reloads_when_another_process_rewrites_the_index(tmp_path):
+    reader = LocalBackend(path=str(tmp_path))
+    assert reader.query(vector(0), "x.pdf", top_k=1).points == []
+
+    writer = LocalBackend(path=str(tmp_path))
+    writer.upsert(["a"], [vector(0)], [payload("A", "x.pdf")])
+    assert [p.id for p in reader.query(vector(0), "x.pdf", top_k=1).points] == ["a"]
+
+    writer.upsert(["b"], [vector(1)], [payload("B", "x.pdf")])
+    writer.delete(["a"])
+    assert [p.id for p in reader.query(vector(0), "x.pdf", top_k=5).points] == ["b"]
+
+def test_queries_never_see_a_half_swapped_index(tmp_path):
+    backend = LocalBackend(path=str(tmp_path))
+    backend.upsert(["p0"], [vector(0)], [payload("P0", "x.pdf")])
+    errors, done = [], threading.Event()
+
+    def query_until_done():
+        while not done.is_set():
+            try:
+                for point in backend.query(vector(0), "x.pdf", top_k=50).points:
+                    assert point.payload["text"] == point.id.upper()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=query_until_done) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(1, 40):
+        backend.upsert([f"p{i}"], [vector(i)], [payload(f"P{i}", "x.pdf")])
+        if i % 3 == 0:
+            backend.delete([f"p{i - 1}"])
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
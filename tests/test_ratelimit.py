@@ -0,0 +1,83 @@
+import time
+import asyncio
+from src.ratelimit import AdaptiveConcurrencyLimiter, RateLimiter, TokenBucket
+
+def elapsed(coro) -> float:
+    async def timed():
+        start = time.monotonic()
+        await coro
+        return time.monotonic() - start
+    return asyncio.run(timed())
+
+def test_disabled_bucket_never_waits():
+    bucket = TokenBucket(rate_per_minute=0)
+
+    async def drain():
+        for _ in range(1000):
+            await bucket.acquire()
+    assert elapsed(drain()) < 0.1
+
+def test_bucket_starts_full_then_waits_for_refill():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 tokens per second
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+    assert elapsed(take(2)) < 0.05
+    waited = elapsed(take(1))
+    assert 0.05 < waited < 0.5
+
+def test_bucket_clamps_requests_larger_than_capacity():
+    bucket = TokenBucket(rate_per_minute=600, capacity=5)
+    assert elapsed(bucket.acquire(50)) < 0.05
+    assert bucket.tokens == 0
+
+def test_rate_limiter_applies_token_budget():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=600)
+
+    async def calls():
+        await limiter.acquire(600)
+        await limiter.acquire(1)
+    waited = elapsed(calls())
+    assert 0.05 < waited < 0.5
+
+def test_rate_limiter_applies_request_budget():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=0)
+    limiter.requests = TokenBucket(600, capacity=1)
+
+    async def calls():
+        await limiter.acquire(10_000)
+        await limiter.acquire(10_000)
+    assert 0.05 < elapsed(calls()) < 0.5
+
+def test_adaptive_limiter_halves_on_failure_and_grows_on_success():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8)
+        await limiter.record_failure()
+        await limiter.record_failure()
+        assert limiter.limit == 2
+        await limiter.record_success()
+        assert limiter.limit == 3
+        for _ in range(10):
+            await limiter.record_success()
+        assert limiter.limit == 8
+        for _ in range(10):
+            await limiter.record_failure()
+        assert limiter.limit == 1
+    asyncio.run(scenario())
+
+def test_adaptive_limiter_bounds_concurrency():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(max_limit=2)
+        running, peak = 0, 0
+
+        async def task():
+            nonlocal running, peak
+            async with limiter:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+        await asyncio.gather(*(task() for _ in range(10)))
+        return peak
+    assert asyncio.run(scenario()) == 2
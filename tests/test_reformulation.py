@@ -0,0 +1,50 @@
+import pytest
+from src.reformulation import ReformulationPolicy
+
+HISTORY = [
+    ["What are the core courses in year one?", "They are WIX1001 and WIX1002."],
+    ["How many credits is WIX1001?", "WIX1001 is worth 3 credits."],
+]
+
+def test_first_turn_is_never_rewritten():
+    assert ReformulationPolicy(mode="always").decide([], "and for year two?") == (False, "no_history")
+
+def test_always_mode_rewrites_every_follow_up():
+    policy = ReformulationPolicy(mode="always")
+    assert policy.decide(HISTORY, "What is the passing grade for Pharmacy students?") == (True, "always")
+
+@pytest.mark.parametrize("query", [
+    "How many credits is it worth?",
+    "Are those courses compulsory?",
+    "And for year two?",
+    "What about Medicine?",
+    "Year two?",
+    "What if I fail...",
+])
+def test_context_dependent_queries_are_rewritten(query):
+    assert ReformulationPolicy(mode="heuristic").decide(HISTORY, query) == (True, "context_dependent")
+
+@pytest.mark.parametrize("query", [
+    "What is the passing grade for Pharmacy students?",
+    "When is the add and drop period for electives?",
+])
+def test_self_contained_queries_are_not_rewritten(query):
+    assert ReformulationPolicy(mode="heuristic").decide(HISTORY, query) == (False, "self_contained")
+
+def test_memo_is_keyed_by_recent_history_and_normalized_query():
+    policy = ReformulationPolicy(memo_size=10, history_turns=1)
+    policy.put(HISTORY, "How many credits is it worth?", "How many credits is WIX1001 worth?")
+    assert policy.get(HISTORY, "  how many credits IS it worth? ") == "How many credits is WIX1001 worth?"
+    # only the last turn is part of the key
+    assert policy.get([["Something else", "Anything"], HISTORY[-1]], "How many credits is it worth?") is not None
+    assert policy.get(HISTORY[:1], "How many credits is it worth?") is None
+
+def test_memo_evicts_the_least_recently_used_rewrite():
+    policy = ReformulationPolicy(memo_size=2)
+    policy.put(HISTORY, "first?", "first rewrite")
+    policy.put(HISTORY, "second?", "second rewrite")
+    assert policy.get(HISTORY, "first?") == "first rewrite"
+    policy.put(HISTORY, "third?", "third rewrite")
+    assert policy.get(HISTORY, "second?") is None
+    assert policy.get(HISTORY, "first?") == "first rewrite"
+    assert policy.get(HISTORY, "third?") == "third rewrite"
@@ -0,0 +1,130 @@
+import json
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.config import Config
+from src.embedder import Embedder
+from src.fakes import FakeGeminiClient
+from src.llm import GeminiLLM
+from src.ratelimit import RateLimiter
+from src.retriever import FLAGGED_MESSAGE, RAG
+from src.services import services
+
+class ScriptedClient(FakeGeminiClient):
+    """
+    FakeGeminiClient with a configurable guardrail verdict and latency, recording the
+    start and end of every call by kind.
+    """
+    def __init__(self, status="SAFE", guardrail_latency=0.05):
+        super().__init__()
+        self.status = status
+        self.guardrail_latency = guardrail_latency
+        self.events = []
+
+    @staticmethod
+    def kind(contents) -> str:
+        text = contents if isinstance(contents, str) else json.dumps(contents)
+        if "reformulated_message" in text:
+            return "reformulate"
+        if '"status"' in text:
+            return "guardrail"
+        if '"summary"' in text:
+            return "summary"
+        return "generate"
+
+    async def generate_content(self, model, contents, config):
+        kind = self.kind(contents)
+        self.events.append(f"{kind}_start")
+        if kind == "guardrail":
+            await asyncio.sleep(self.guardrail_latency)
+            response = self._response(json.dumps({"status": self.status}))
+        else:
+            response = await super().generate_content(model, contents, config)
+        self.events.append(f"{kind}_end")
+        return response
+
+    def kinds(self):
+        return [event[:-len("_start")] for event in self.events if event.endswith("_start")]
+
+class FakeEmbedder:
+    def generate_embedding(self, text):
+        return np.ones(Embedder.get_dimension(), dtype=np.float32)
+
+    def generate_embeddings(self, texts):
+        return [self.generate_embedding(text) for text in texts]
+
+class FakeVectorDB:
+    """
+    Returns one chunk (after `release` is set, if given), recording queries into a shared
+    event log and whether a query was cancelled.
+    """
+    def __init__(self, events):
+        self.events = events
+        self.release = None
+        self.queries = []
+        self.cancelled = False
+
+    async def aquery(self, query, selected_course, query_vector=None):
+        self.queries.append(query)
+        self.events.append("vector_query")
+        try:
+            if self.release is not None:
+                await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        chunk = SimpleNamespace(text="Core courses are WIX1001 and WIX1002.", score=1.0, metadata={})
+        return SimpleNamespace(points=[chunk])
+
+class FakeReranker:
+    def rerank(self, chunks, query):
+        return chunks
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(Config, "GUARDRAIL_EMBEDDING_ENABLED", False)  # every verdict comes from the LLM
+    client = ScriptedClient()
+    vectordb = FakeVectorDB(client.events)
+    fakes = {
+        "llm": GeminiLLM(client=client, rate_limiter=RateLimiter(requests_per_minute=0, tokens_per_minute=0)),
+        "embedder": FakeEmbedder(),
+        "vectordb": vectordb,
+        "reranker": FakeReranker(),
+    }
+    for name, instance in fakes.items():
+        services.override(name, instance)
+    yield SimpleNamespace(rag=RAG(faq_enabled=False, cache_enabled=False), client=client, vectordb=vectordb)
+    for name in fakes:
+        services.reset(name)
+
+HISTORY = [["What are the core courses in year one?", "They are WIX1001 and WIX1002."]]
+
+def test_flagged_message_skips_generation_and_cancels_retrieval(pipeline):
+    pipeline.client.status = "UNSAFE"
+
+    async def turn():
+        pipeline.vectordb.release = asyncio.Event()  # retrieval stays in flight until cancelled
+        answer, contexts = await pipeline.rag.aget_response_with_context("What are the core courses?", [], "Computer Science")
+        await asyncio.sleep(0)  # let the cancellation reach the query
+        # checked before asyncio.run cancels leftover tasks on its own
+        return answer, contexts, pipeline.vectordb.cancelled
+
+    assert asyncio.run(turn()) == (FLAGGED_MESSAGE, [], True)
+    assert pipeline.client.kinds() == ["guardrail"]
+    assert pipeline.vectordb.queries == ["What are the core courses?"]
+
+def test_guardrail_runs_alongside_reformulation_and_retrieval(pipeline):
+    answer, contexts = asyncio.run(pipeline.rag.aget_response_with_context("And for year two?", HISTORY, "Computer Science"))
+    assert "core courses" in answer
+    assert contexts == ["Core courses are WIX1001 and WIX1002."]
+    events = pipeline.client.events
+    # the rewrite and the search for it do not wait for the guardrail verdict, but generation does
+    assert events.index("reformulate_end") < events.index("vector_query") < events.index("guardrail_end") < events.index("generate_start")
+    assert pipeline.vectordb.queries == ["What are the core courses?"]
+
+def test_flagged_follow_up_skips_generation(pipeline):
+    pipeline.client.status = "UNSAFE"
+    answer, contexts = asyncio.run(pipeline.rag.aget_response_with_context("And for year two?", HISTORY, "Computer Science"))
+    assert (answer, contexts) == (FLAGGED_MESSAGE, [])
+    assert "generate" not in pipeline.client.kinds()
@@ -0,0 +1,34 @@
+import json
+import pytest
+from src.streaming import JsonFieldStreamer
+
+def stream(text: str, chunk_size: int, field: str = "message") -> str:
+    streamer = JsonFieldStreamer(field)
+    decoded = "".join(streamer.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size))
+    return decoded + streamer.finish()
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_decodes_escapes_split_across_chunks(chunk_size):
+    value = 'Line one\nTab\there "quoted" \\ back/slash – café 🎓 done'
+    text = json.dumps({"message": value})  # ASCII escapes, incl. a surrogate pair
+    assert stream(text, chunk_size) == value
+
+def test_ignores_other_fields_and_text_after_the_value():
+    text = '{"status": "ok", "message": "Hello", "extra": "ignored"}'
+    assert stream(text, 4) == "Hello"
+
+def test_yields_nothing_before_the_field_appears():
+    streamer = JsonFieldStreamer("message")
+    assert streamer.feed('{"mess') == ""
+    assert streamer.feed('age": "Hi') == "Hi"
+    assert streamer.feed(' there"}') == " there"
+    assert streamer.done
+
+def test_finish_falls_back_to_full_parse_or_plain_text():
+    streamer = JsonFieldStreamer("message")
+    streamer.feed('{"answer": 42}')
+    assert streamer.finish() == ""
+
+    streamer = JsonFieldStreamer("message")
+    streamer.feed("Plain text answer")
+    assert streamer.finish() == "Plain text answer"
@@ -0,0 +1,175 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from src import vector
+from src.backends import QueryResult, VectorBackend
+from src.cache import ResponseCache
+from src.config import Config
+from src.manifest import point_id, text_hash
+from src.services import services
+
+class MemoryBackend(VectorBackend):
+    def __init__(self):
+        self.points = {}
+        self.upserted = []
+        self.queried = []
+
+    def upsert(self, ids, vectors, payloads):
+        self.upserted.extend(ids)
+        self.points.update(zip(ids, payloads))
+
+    def delete(self, ids):
+        for point in ids:
+            self.points.pop(point, None)
+
+    def iter_points(self):
+        return iter(self.points.items())
+
+    def clear(self):
+        self.points = {}
+
+    def query(self, vector, filename, top_k):
+        self.queried.append(vector)
+        return QueryResult(points=[])
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """
+    A data folder of placeholder PDFs whose parsed pages come from `pages`, one chunk per page.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    pages = {}
+    parsed = []
+
+    def write(filename, *texts):
+        pages[filename] = list(texts)
+        (tmp_path / "data" / filename).write_text("\n".join(texts))
+
+    def remove(filename):
+        pages.pop(filename)
+        (tmp_path / "data" / filename).unlink()
+
+    async def fake_parse_pdf(file_path, filepaths=None, select=None, parents=None):
+        documents = []
+        for path in filepaths or sorted(Path(file_path).glob("*.pdf")):
+            parsed.append(path.name)
+            for page, text in enumerate(pages[path.name], start=1):
+                page_hash = text_hash(text)
+                metadata = {"filename": path.name, "page": page, "page_hash": page_hash}
+                page_doc = SimpleNamespace(id_=point_id(path.name, page, page_hash), text=text, metadata=metadata)
+                if select is not None and not select(page_doc):
+                    continue
+                if parents is not None:
+                    parents[page_doc.id_] = {"text": text, "filename": path.name, "page": page}
+                documents.append(SimpleNamespace(
+                    id_=point_id(path.name, page, page_hash, "chunk"),
+                    text=text,
+                    embedding=[1.0, 0.0],
+                    metadata={**metadata, "parent_id": page_doc.id_, "chunk": 0},
+                ))
+        return documents
+
+    monkeypatch.setattr(vector, "parse_pdf", fake_parse_pdf)
+    return SimpleNamespace(write=write, remove=remove, parsed=parsed)
+
+def texts(db):
+    return sorted(payload["text"] for payload in db.backend.points.values())
+
+def test_sync_indexes_only_what_changed(corpus):
+    db = vector.VectorDB(backend=MemoryBackend())
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1002.", "Electives are chosen in year two.")
+    corpus.write("b.pdf", "The library opens at 8am.")
+    asyncio.run(db.sync())
+    assert texts(db) == ["Core courses are WIX1001 and WIX1002.", "Electives are chosen in year two.", "The library opens at 8am."]
+    assert db.lexical_index().search("library", "b.pdf", top_k=1)[0].payload["text"] == "The library opens at 8am."
+
+    corpus.parsed.clear()
+    db.backend.upserted.clear()
+    asyncio.run(db.sync())
+    assert corpus.parsed == [] and db.backend.upserted == []
+
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1002.", "Electives are chosen in year three.")
+    asyncio.run(db.sync())
+    assert corpus.parsed == ["a.pdf"]
+    assert len(db.backend.upserted) == 1
+    assert texts(db) == ["Core courses are WIX1001 and WIX1002.", "Electives are chosen in year three.", "The library opens at 8am."]
+    parent_id = point_id("a.pdf", 2, text_hash("Electives are chosen in year three."))
+    assert db.parent_store.get(parent_id) == "Electives are chosen in year three."
+    assert db.parent_store.get(point_id("a.pdf", 2, text_hash("Electives are chosen in year two."))) is None
+
+def test_sync_drops_deleted_files(corpus):
+    db = vector.VectorDB(backend=MemoryBackend())
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1002.")
+    corpus.write("b.pdf", "The library opens at 8am.")
+    asyncio.run(db.sync())
+
+    corpus.remove("b.pdf")
+    asyncio.run(db.sync())
+    assert texts(db) == ["Core courses are WIX1001 and WIX1002."]
+    assert db.lexical_index().search("library", "b.pdf", top_k=1) == []
+    assert db.parent_store.get(point_id("b.pdf", 1, text_hash("The library opens at 8am."))) is None
+
+def test_sync_reindexes_everything_when_chunk_settings_change(corpus, monkeypatch):
+    db = vector.VectorDB(backend=MemoryBackend())
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1002.")
+    corpus.write("b.pdf", "The library opens at 8am.")
+    asyncio.run(db.sync())
+
+    corpus.parsed.clear()
+    monkeypatch.setattr(Config, "CHUNK_MAX_TOKENS", Config.CHUNK_MAX_TOKENS + 1)
+    asyncio.run(db.sync())
+    assert sorted(corpus.parsed) == ["a.pdf", "b.pdf"]
+    assert len(db.backend.points) == 2
+
+@pytest.fixture
+def cached(monkeypatch):
+    """
+    A fresh response cache in place of the module one, holding a single answer.
+    """
+    cache = ResponseCache(max_size=10, ttl=60, similarity_threshold=0.9)
+    monkeypatch.setattr(vector, "response_cache", cache)
+
+    def fill():
+        cache.put("CS", "What are the core courses?", [1.0, 0.0], "WIX1001", ["context"], latency=1.0)
+        return cache
+    return fill
+
+def is_empty(cache):
+    return cache.get_exact("CS", "What are the core courses?") is None
+
+def test_insert_sync_and_clear_invalidate_the_response_cache(corpus, cached):
+    db = vector.VectorDB(backend=MemoryBackend())
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1002.")
+    cache = cached()
+    asyncio.run(db.insert())
+    assert is_empty(cache)
+
+    cached()
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1003.")
+    asyncio.run(db.sync())
+    assert is_empty(cache)
+
+    cached()
+    db.clear()
+    assert is_empty(cache)
+
+def test_sync_without_changes_keeps_the_response_cache(corpus, cached):
+    db = vector.VectorDB(backend=MemoryBackend())
+    corpus.write("a.pdf", "Core courses are WIX1001 and WIX1002.")
+    asyncio.run(db.sync())
+    cache = cached()
+    asyncio.run(db.sync())
+    assert not is_empty(cache)
+
+def test_query_embeds_with_the_embedder_service(corpus, monkeypatch):
+    monkeypatch.setattr(Config, "HYBRID_SEARCH", False)
+    services.override("embedder", SimpleNamespace(generate_embedding=lambda text: [0.5, 0.5]))
+    try:
+        db = vector.VectorDB(backend=MemoryBackend())
+        db.query("What are the core courses?", "Computer Science")
+    finally:
+        services.reset("embedder")
+    assert db.backend.queried == [[0.5, 0.5]]